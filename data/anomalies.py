@@ -0,0 +1,82 @@
+import streamlit as st
+
+from data.filters import current_filters, frame_mask
+from data.loader import dataset_store, register_aggregate
+from data.queries import query
+from data.schema import concat_compact
+from data.settings import DATA_PATH
+
+# SEZNAMY ANOMÁLIÍ (stránka Anomalies a data.api)
+# ------------------------------------------------------------------------------
+
+# Hranice podílu vratek (%), nad kterou je produkt / zákazník podezřelý
+RETURN_RATE_LIMIT = 30
+
+# Podíl objednávek s nejvyšší hodnotou (top 1 %)
+TOP_ORDERS_SHARE = 0.01
+
+
+# Produkty s podílem vrácených kusů nad limitem (prodané kusy bez vratek,
+# viz data.returns), seřazené sestupně podle podílu
+def high_return_products(limit=RETURN_RATE_LIMIT, path=DATA_PATH):
+    products = query("return_rates", "ProductName", path=path)[["ProductName", "Sold_Qty", "Returned_Qty", "Return Rate (%)"]] \
+        .rename(columns={"Sold_Qty": "Total_Sold", "Returned_Qty": "Returned"})
+    products["Return Rate (%)"] = products["Return Rate (%)"].round(2)
+
+    products = products.dropna()
+    products = products[products["Total_Sold"] > 0]
+    return products[products["Return Rate (%)"] > limit].sort_values(by="Return Rate (%)", ascending=False)
+
+
+# Zákazníci s podílem vrácených objednávek nad limitem
+def high_return_customers(limit=RETURN_RATE_LIMIT, path=DATA_PATH):
+    customers = query("return_rates", "CustomerNo", orders=True, path=path)[
+        ["CustomerNo", "Total_Orders", "Returned_Orders", "Order Return Rate (%)"]
+    ].rename(columns={"Order Return Rate (%)": "Return Rate (%)"})
+    customers["Return Rate (%)"] = customers["Return Rate (%)"].round(2)
+    return customers[customers["Return Rate (%)"] > limit].sort_values(by="Return Rate (%)", ascending=False)
+
+
+# Objednávky v horním podílu podle hodnoty -> (hranice, objednávky sestupně)
+def top_orders(share=TOP_ORDERS_SHARE, path=DATA_PATH):
+    order_values = query("order_values", path=path)
+    threshold = order_values["TotalOrderValue"].quantile(1 - share)
+    orders = order_values[order_values["TotalOrderValue"] >= threshold]
+    return threshold, orders.sort_values(by="TotalOrderValue", ascending=False)
+
+
+# ŘÁDKY SE ZÁPORNÝM OBRATEM BEZ PŘÍZNAKU VRATKY
+# ------------------------------------------------------------------------------
+#
+# Kontrola na stránce Anomalies ukazuje jednotlivé řádky, kde je Revenue
+# záporné a řádek není označený jako vratka. Takových řádků je málo, proto
+# se vyberou jednou (i po částech souboru) a stránka nepotřebuje celý dataset.
+# Řádky mají sloupce data, země a ReturnFlag - filtr je jen maska.
+
+COLUMNS = ["Date", "CustomerNo", "ProductName", "Quantity", "Price", "Revenue", "ReturnFlag", "Country"]
+
+
+def build_unflagged_negatives(df):
+    suspicious = (df["Revenue"].to_numpy() < 0) & ~df["ReturnFlag"].to_numpy(dtype=bool)
+    return df.loc[suspicious, COLUMNS]
+
+
+def merge_unflagged_negatives(left, right):
+    return concat_compact([left, right])
+
+
+def restrict_unflagged_negatives(rows, filters):
+    return rows[frame_mask(rows, filters)]
+
+
+register_aggregate(
+    "unflagged_negatives",
+    build_unflagged_negatives,
+    merge=merge_unflagged_negatives,
+    restrict=restrict_unflagged_negatives,
+)
+
+
+def load_unflagged_negatives(path=DATA_PATH):
+    with st.spinner("Building aggregates..."):
+        return dataset_store(path).aggregate("unflagged_negatives", current_filters())
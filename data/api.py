@@ -0,0 +1,231 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from data.anomalies import RETURN_RATE_LIMIT, TOP_ORDERS_SHARE, high_return_customers, high_return_products, \
+    load_unflagged_negatives, top_orders
+from data.loader import artifact_version
+from data.overview import load_overview
+from data.queries import query
+from data.schema import price_in_pounds
+from data.settings import API_CACHE_SIZE, API_HOST, API_PORT, DATA_PATH
+
+# LOKÁLNÍ JSON API NAD STEJNÝMI AGREGACEMI JAKO DASHBOARD
+# ------------------------------------------------------------------------------
+#
+# Jiné interní nástroje dostanou stejná čísla jako stránky, bez procházení UI
+# nebo stahování Excelu. Odpovědi se počítají stejnými funkcemi jako stránky
+# (data.queries, data.overview, data.anomalies), takže využijí i předpočítané
+# výsledky (data.precompute). Vždy pro celý dataset - globální filtr je stav
+# relace dashboardu.
+#
+#   GET /api                                 seznam endpointů
+#   GET /api/kpis[?approx=1]                 souhrnné KPI (General Overview)
+#   GET /api/monthly-revenue                 měsíční tržby (Sales Trends)
+#   GET /api/aov-by-country                  AOV podle země (Geographic)
+#   GET /api/top-products?measure=Quantity|Revenue&n=10
+#   GET /api/anomalies/high-return-products[?limit=30]
+#   GET /api/anomalies/high-return-customers[?limit=30]
+#   GET /api/anomalies/top-orders[?share=0.01]
+#   GET /api/anomalies/negative-revenue
+#
+# Tabulky se vrací jako {"data_version": ..., "rows": [{sloupec: hodnota}, ...]}.
+# ETag je otisk verze dat a požadavku - klient s If-None-Match dostane 304
+# bez přepočtu. Odpovědi se drží v LRU cache (API_CACHE_SIZE) pro aktuální
+# verzi dat a posílají se komprimované (gzip), pokud to klient podporuje.
+#
+# Spuštění: python -m data.api [cesta_k_csv] [--host 127.0.0.1] [--port 8502]
+
+# Menší odpovědi se nekomprimují (gzip hlavička by je jen zvětšila)
+GZIP_MIN_BYTES = 1024
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _param(params, name, default, convert=str):
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        return convert(values[0])
+    except ValueError:
+        raise BadRequest(f"invalid value for {name!r}: {values[0]!r}") from None
+
+
+def _table(df):
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def _kpis(path, params):
+    kpis = load_overview(path, approx=_param(params, "approx", "0") == "1")
+    return {key: value.isoformat() if isinstance(value, pd.Timestamp) else value for key, value in kpis.items()}
+
+
+def _top_products(path, params):
+    measure = _param(params, "measure", "Quantity")
+    if measure not in ("Quantity", "Revenue"):
+        raise BadRequest(f"unknown measure: {measure!r}")
+    n = _param(params, "n", 10, int)
+    if not 0 < n <= 1000:
+        raise BadRequest("n must be between 1 and 1000")
+    return {"rows": _table(query("top_products", measure, n, path=path))}
+
+
+def _top_orders(path, params):
+    share = _param(params, "share", TOP_ORDERS_SHARE, float)
+    if not 0 < share <= 1:
+        raise BadRequest("share must be in (0, 1]")
+    threshold, orders = top_orders(share, path=path)
+    return {"threshold": float(threshold), "rows": _table(orders)}
+
+
+def _negative_revenue(path, params):
+    rows = load_unflagged_negatives(path)
+    return {"rows": _table(rows.assign(Price=price_in_pounds(rows["Price"])))}
+
+
+# Endpoint -> funkce (cesta k datům, parametry dotazu) -> dict do JSON
+ENDPOINTS = {
+    "/api/kpis": _kpis,
+    "/api/monthly-revenue": lambda path, params: {"rows": _table(query("monthly_revenue", path=path))},
+    "/api/aov-by-country": lambda path, params: {"rows": _table(query("aov_by_country", path=path))},
+    "/api/top-products": _top_products,
+    "/api/anomalies/high-return-products": lambda path, params: {
+        "rows": _table(high_return_products(_param(params, "limit", RETURN_RATE_LIMIT, float), path=path)),
+    },
+    "/api/anomalies/high-return-customers": lambda path, params: {
+        "rows": _table(high_return_customers(_param(params, "limit", RETURN_RATE_LIMIT, float), path=path)),
+    },
+    "/api/anomalies/top-orders": _top_orders,
+    "/api/anomalies/negative-revenue": _negative_revenue,
+}
+
+
+class ResponseCache:
+    def __init__(self, size=API_CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()  # (verze, požadavek) -> (etag, tělo, tělo v gzip)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, key, entry):
+        with self._lock:
+            # Odpovědi pro starší verzi dat už nikdo nepotřebuje
+            for old in [k for k in self._entries if k[0] != key[0]]:
+                del self._entries[old]
+            self._entries[key] = entry
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+def _etag(version, request):
+    return '"' + hashlib.sha1(f"{version}|{request}".encode()).hexdigest()[:20] + '"'
+
+
+def _render(version, endpoint, path, params):
+    body = json.dumps({"data_version": version, **endpoint(path, params)}, default=str).encode()
+    compressed = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+    return body, compressed
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    server_version = "SalesAPI/1.0"
+    path_to_data = DATA_PATH
+    cache = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        route = url.path.rstrip("/") or "/"
+        if route == "/api":
+            return self._send_json(200, {"endpoints": sorted(ENDPOINTS)})
+        endpoint = ENDPOINTS.get(route)
+        if endpoint is None:
+            return self._send_json(404, {"error": f"unknown endpoint: {route}"})
+
+        params = parse_qs(url.query)
+        request = route + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        try:
+            version = artifact_version(self.path_to_data)
+            etag = _etag(version, request)
+            if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                return self._send(304, None, etag)
+
+            entry = self.cache.get((version, request))
+            if entry is None:
+                body, compressed = _render(version, endpoint, self.path_to_data, params)
+                entry = (etag, body, compressed)
+                self.cache.put((version, request), entry)
+        except BadRequest as exc:
+            return self._send_json(400, {"error": str(exc)})
+        except Exception as exc:  # Chybějící data, chyba backendu - klient dostane odpověď
+            self.log_error("%s failed: %r", request, exc)
+            return self._send_json(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+        _, body, compressed = entry
+        if compressed is not None and "gzip" in self.headers.get("Accept-Encoding", ""):
+            return self._send(200, compressed, etag, encoding="gzip")
+        return self._send(200, body, etag)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode())
+
+    def _send(self, status, body, etag=None, encoding=None):
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")  # Vždy ověřit přes If-None-Match
+            self.send_header("Vary", "Accept-Encoding")
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"{self.address_string()} {format % args}\n")
+
+
+def make_server(path=DATA_PATH, host=API_HOST, port=API_PORT):
+    handler = type("Handler", (APIHandler,), {"path_to_data": path, "cache": ResponseCache()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def _option(args, name, default):
+    return args[args.index(name) + 1] if name in args else default
+
+
+if __name__ == "__main__":
+    import streamlit.logger
+
+    streamlit.logger.set_log_level("error")  # Varování o chybějícím kontextu Streamlitu
+
+    args = sys.argv[1:]
+    options = {"--host", "--port"}
+    paths = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] not in options)]
+    path = os.path.abspath(paths[0] if paths else DATA_PATH)
+
+    server = make_server(path, _option(args, "--host", API_HOST), int(_option(args, "--port", API_PORT)))
+    print(f"Serving {path} on http://{server.server_address[0]}:{server.server_address[1]}/api", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,102 @@
+import json
+import os
+import pickle
+import shutil
+import time
+
+import streamlit as st
+
+from data.settings import ARTIFACT_DIR
+
+# ÚLOŽIŠTĚ PŘEDPOČÍTANÝCH VÝSLEDKŮ
+# ------------------------------------------------------------------------------
+#
+# python -m data.precompute spočítá předagregace a tabulky stránek předem
+# (např. po nočním exportu) a uloží je sem. Aplikace pak pro nefiltrovaný
+# pohled jen načte hotový výsledek místo počítání z datasetu.
+#
+# Každá verze dat má vlastní adresář <ARTIFACT_DIR>/<název datasetu>/<verze>/:
+#   <klíč>.pkl    - jeden výsledek (pickle)
+#   manifest.json - seznam výsledků; zapisuje se jako poslední, takže verze
+#                   bez manifestu (rozpracovaná, přerušená) se nikdy nečte
+# Verze = otisk CSV (data_version) + značka formátu, změna dat nebo nastavení
+# tedy znamená jiný adresář. Starší verze se po dokončení nové mažou.
+
+MANIFEST = "manifest.json"
+
+# Kolik posledních verzí nechat na disku (běžící aplikace může číst předchozí)
+KEEP_VERSIONS = 2
+
+
+def artifact_dir(path, version):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(ARTIFACT_DIR, name, version)
+
+
+def _key_file(directory, key):
+    return os.path.join(directory, f"{key}.pkl")
+
+
+def write_artifact(directory, key, value):
+    os.makedirs(directory, exist_ok=True)
+    target = _key_file(directory, key)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, target)
+    return os.path.getsize(target)
+
+
+# Zveřejnění verze - po zápisu manifestu ji aplikace začne používat
+def publish(directory, entries, source):
+    manifest = {"source": source, "created": time.time(), "artifacts": entries}
+    tmp_path = os.path.join(directory, f"{MANIFEST}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST))
+
+
+# Smazání starších verzí téhož datasetu
+def prune(directory, keep=KEEP_VERSIONS):
+    parent = os.path.dirname(directory)
+    versions = sorted(
+        (os.path.join(parent, name) for name in os.listdir(parent)),
+        key=os.path.getmtime, reverse=True,
+    )
+    for old in versions[keep:]:
+        if old != directory:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+# Manifest se při předpočtu přepisuje (nejdřív agregace, pak tabulky) -
+# čas úpravy je součástí klíče cache
+@st.cache_resource(max_entries=4)
+def _manifest(directory, mtime):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)["artifacts"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# Načtené výsledky se sdílí mezi relacemi (jeden objekt na klíč a zápis manifestu)
+@st.cache_resource(max_entries=64)
+def _load(directory, key, mtime):
+    with open(_key_file(directory, key), "rb") as f:
+        return pickle.load(f)
+
+
+# Předpočítaný výsledek pro danou verzi dat, nebo None
+def load_artifact(path, version, key):
+    directory = artifact_dir(path, version)
+    try:
+        mtime = os.path.getmtime(os.path.join(directory, MANIFEST))
+    except OSError:
+        return None
+    manifest = _manifest(directory, mtime)
+    if manifest is None or key not in manifest:
+        return None
+    try:
+        return _load(directory, key, mtime)
+    except (OSError, pickle.UnpicklingError):
+        return None  # Verzi mezitím smazal novější předpočet
@@ -0,0 +1,162 @@
+import csv
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# MĚŘENÍ VÝKONU STRÁNEK (bez prohlížeče)
+# ------------------------------------------------------------------------------
+#
+# Pro každou velikost dat se vygeneruje syntetické CSV (data.synthetic) a v
+# samostatném procesu se změří:
+#   load:csv        - první načtení z CSV (včetně zápisu binární kopie)
+#   load:sidecar    - načtení z binární kopie
+#   aggregate:*     - stavba jednotlivých předagregací
+#   page:*          - celé vykreslení stránky (Streamlit v "bare" režimu,
+#                     widgety vrací výchozí hodnoty)
+#   <stránka>:<sekce> - sekce stránky a pomocné funkce (grafy, tabulky)
+#                     podle data.profiling
+#   <stránka>:export:<název> - zápis každého exportu stránky do Excelu
+#                     (excel_bytes; stránka soubor vytváří až po kliknutí)
+# Každá velikost běží ve vlastním procesu, takže se neovlivňují cache
+# a špička paměti (peak_rss_mb) odpovídá jedné velikosti.
+#
+# Spuštění: python -m data.benchmark [--rows 1e6,1e7,1e8] [--out benchmark_report]
+#                                    [--data-dir .cache/benchmark] [--seed N]
+
+DEFAULT_ROWS = [1_000_000, 10_000_000, 100_000_000]
+
+
+def _peak_rss_mb():
+    # Linux vrací ru_maxrss v KB, macOS v bajtech
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Měření v podprocesu - cesta k datům a cache jsou v prostředí (SALES_DATA_PATH,
+# SALES_CACHE_DIR), takže je moduly aplikace převezmou při importu
+def run_worker(path):
+    import streamlit as st
+    import streamlit.logger
+
+    streamlit.logger.set_log_level("error")  # Varování o chybějícím kontextu Streamlitu
+
+    from data.export import excel_bytes
+    from data.loader import AGGREGATES, DatasetStore, data_version, dataset_store
+    from data.pages import PAGES
+    from data.profiling import start_run
+    from data.streaming import streaming_enabled
+
+    phases = {}
+
+    def timed(phase, fn):
+        start = time.perf_counter()
+        value = fn()
+        phases[phase] = {"seconds": time.perf_counter() - start, "calls": 1}
+        return value
+
+    store = dataset_store(path)
+    streaming = streaming_enabled(path)
+    timed("load:csv", store.refresh)
+    timed("load:sidecar", DatasetStore(path).refresh)
+    for name in AGGREGATES:
+        timed(f"aggregate:{name}", lambda: store.aggregate(name))
+
+    st.session_state["profiling"] = True
+    for page, module in PAGES.items():
+        run = start_run(page)
+        timed(f"page:{page}", module.render)
+        for record in run.sections:
+            phase = phases.setdefault(f"{page}:{record.name}", {"seconds": 0.0, "calls": 0})
+            phase["seconds"] += record.seconds
+            phase["calls"] += 1
+        for name, table, sheet_name in run.exports:
+            timed(f"{page}:export:{name}", lambda: excel_bytes(table, name, sheet_name, data_version(path)))
+
+    return {
+        "rows": len(store.df),
+        "streaming": streaming,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "phases": [{"phase": phase, **values} for phase, values in phases.items()],
+    }
+
+
+def run_size(rows, data_dir, seed=0):
+    from data.synthetic import write_csv
+
+    path = os.path.join(data_dir, f"synthetic_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        write_csv(path, rows, seed)
+        print(f"generated {path} in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-cache-") as cache_dir:
+        env = {**os.environ, "SALES_DATA_PATH": path, "SALES_CACHE_DIR": cache_dir}
+        proc = subprocess.run(
+            [sys.executable, "-m", "data.benchmark", "--worker", path],
+            env=env, capture_output=True, text=True,
+        )
+
+    run = {"rows": rows, "csv_bytes": os.path.getsize(path)}
+    if proc.returncode != 0:
+        # Např. nedostatek paměti - velikost se zapíše s chybou a pokračuje se další
+        return {**run, "error": proc.stderr.strip().splitlines()[-1:] or [f"exit code {proc.returncode}"]}
+    return {**run, **json.loads(proc.stdout.strip().splitlines()[-1])}
+
+
+def write_report(runs, out):
+    report = {
+        "generated": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "runs": runs,
+    }
+    with open(f"{out}.json", "w") as f:
+        json.dump(report, f, indent=2, default=str)
+
+    with open(f"{out}.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rows", "phase", "seconds", "calls", "peak_rss_mb"])
+        for run in runs:
+            for phase in run.get("phases", []):
+                writer.writerow([run["rows"], phase["phase"], round(phase["seconds"], 4),
+                                 phase["calls"], run.get("peak_rss_mb")])
+
+
+def _option(args, name, default):
+    return args[args.index(name) + 1] if name in args else default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    if "--worker" in args:
+        print(json.dumps(run_worker(_option(args, "--worker", None)), default=str))
+        sys.exit(0)
+
+    rows = [int(float(r)) for r in _option(args, "--rows", ",".join(map(str, DEFAULT_ROWS))).split(",")]
+    out = _option(args, "--out", "benchmark_report")
+    data_dir = _option(args, "--data-dir", os.path.join(".cache", "benchmark"))
+    seed = int(_option(args, "--seed", "0"))
+
+    runs = []
+    for size in rows:
+        run = run_size(size, data_dir, seed)
+        runs.append(run)
+        if "error" in run:
+            print(f"{size:>12,} rows  failed: {run['error']}", file=sys.stderr)
+            continue
+        pages = sum(p["seconds"] for p in run["phases"] if p["phase"].startswith("page:"))
+        print(f"{size:>12,} rows  load {run['phases'][0]['seconds']:.2f} s  "
+              f"pages {pages:.2f} s  peak {run['peak_rss_mb']:,.0f} MB", file=sys.stderr)
+
+    write_report(runs, out)
+    print(f"{out}.json", f"{out}.csv")
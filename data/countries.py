@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from data.settings import CACHE_DIR
+
+# PŘEVOD NÁZVŮ ZEMÍ NA KÓDY ISO 3166-1 ALPHA-3
+# ------------------------------------------------------------------------------
+#
+# Názvy zemí z exportu se převádějí přes pycountry jen jednou - výsledky se
+# ukládají do tabulky v adresáři cache a při dalších startech se jen načtou.
+# pycountry se importuje, až když je v datech název, který tabulka nezná.
+# Nestandardní názvy z exportu řeší ruční přepisy (None = země bez kódu,
+# na mapě se nezobrazí).
+
+OVERRIDES = {
+    "EIRE": "IRL",
+    "RSA": "ZAF",
+    "USA": "USA",
+    "Korea": "KOR",
+    "Channel Islands": None,     # Jersey a Guernsey mají každý vlastní kód
+    "European Community": None,
+    "West Indies": None,
+    "Unspecified": None,
+}
+
+# Verze tabulky - zvýšit při změně způsobu vyhledávání
+TABLE_VERSION = "1"
+
+
+def table_path():
+    return os.path.join(CACHE_DIR, "country_codes.json")
+
+
+def _lookup(name):
+    import pycountry  # Pomalý import - jen pro názvy, které ještě nejsou v tabulce
+
+    try:
+        return pycountry.countries.lookup(name).alpha_3
+    except LookupError:
+        return None
+
+
+class CountryTable:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.codes = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return table["codes"] if table.get("version") == TABLE_VERSION else {}
+
+    def _write(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": TABLE_VERSION, "codes": self.codes}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def resolve(self, names):
+        missing = [name for name in names if name not in OVERRIDES and name not in self.codes]
+        if missing:
+            with self._lock:
+                for name in missing:
+                    self.codes[name] = _lookup(name)
+                try:
+                    self._write()
+                except OSError:
+                    pass  # Adresář cache není zapisovatelný - tabulka zůstane jen v paměti
+        return {name: OVERRIDES[name] if name in OVERRIDES else self.codes[name] for name in names}
+
+
+# Tabulka se načítá jednou za proces a sdílí se mezi relacemi
+@st.cache_resource
+def country_table(path=None):
+    return CountryTable(path or table_path())
+
+
+# ISO-3 kód ke každé hodnotě sloupce se zemí (None = bez kódu)
+def iso3_codes(countries):
+    countries = pd.Series(countries)
+    mapping = country_table().resolve(list(pd.unique(countries.dropna())))
+    return countries.astype(object).map(mapping)
+
+
+# Názvy zemí, ke kterým se nenašel kód
+def unmatched(countries):
+    mapping = country_table().resolve(list(pd.unique(pd.Series(countries).dropna())))
+    return sorted(name for name, code in mapping.items() if code is None)
+
+
+# Spuštění: python -m data.countries [cesta_k_csv] - vypíše převodní tabulku
+if __name__ == "__main__":
+    from data.settings import DATA_PATH
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    countries = pd.read_csv(path, usecols=["Country"])["Country"]
+    table = CountryTable(table_path())
+    mapping = table.resolve(sorted(pd.unique(countries.dropna())))
+
+    for name, code in mapping.items():
+        source = "override" if name in OVERRIDES else "pycountry"
+        print(f"{name:<28} {code or '-':<4} {source}")
+    missing = [name for name, code in mapping.items() if code is None]
+    print(f"\n{len(mapping)} countries, {len(missing)} without ISO-3 code: {', '.join(missing) or '-'}")
@@ -0,0 +1,123 @@
+from collections import namedtuple
+
+import pandas as pd
+import streamlit as st
+
+from data.filters import current_filters, frame_mask
+from data.loader import dataset_store, register_aggregate
+from data.schema import concat_compact
+from data.settings import DATA_PATH
+
+# Předagregovaná kostka (den × země × produkt × příznak vratky)
+# ------------------------------------------------------------------------------
+#
+# products - součty za kombinaci Day / Country / ProductNo / ProductName / ReturnFlag.
+#            Month je atribut dne (pro měsíční souhrny), nepřidává další buňky.
+# orders   - počet unikátních transakcí za Day / Country / ReturnFlag.
+#
+# Všechny míry v `products` jsou sčitatelné přes libovolnou kombinaci dimenzí
+# kromě Transactions, kterou lze sčítat jen přes dny, země a příznak vratky
+# (jedna transakce obsahuje více produktů). Počty objednávek přes produkty
+# proto vždy počítejte z tabulky `orders`.
+
+PRODUCT_DIMENSIONS = ["Month", "Day", "Country", "ProductNo", "ProductName", "ReturnFlag"]
+ORDER_DIMENSIONS = ["Month", "Day", "Country", "ReturnFlag"]
+
+SalesCube = namedtuple("SalesCube", ["products", "orders"])
+
+
+def build_cube(df):
+    quantity = df["Quantity"].astype("int64")
+
+    lines = pd.DataFrame({
+        "Month": df["YearMonth"],
+        "Day": df["Date"].dt.normalize(),
+        "Country": df["Country"],
+        "ProductNo": df["ProductNo"],
+        "ProductName": df["ProductName"],
+        "ReturnFlag": df["ReturnFlag"],
+        "TransactionNo": df["TransactionNo"],
+        "Revenue": df["Revenue"],
+        # Tržby jen z řádků s kladným množstvím (bez vratek a opravných řádků)
+        "PositiveRevenue": df["Revenue"].where(quantity > 0, 0.0),
+        "Quantity": quantity,
+        # Kladná / záporná část množství zvlášť - z nich se dají složit prodané
+        # i vrácené kusy podle znaménka i podle příznaku ReturnFlag
+        "PositiveQuantity": quantity.clip(lower=0),
+        "NegativeQuantity": (-quantity).clip(lower=0),
+    })
+
+    products = lines.groupby(PRODUCT_DIMENSIONS, observed=True, sort=False).agg(
+        Revenue=("Revenue", "sum"),
+        PositiveRevenue=("PositiveRevenue", "sum"),
+        Quantity=("Quantity", "sum"),
+        PositiveQuantity=("PositiveQuantity", "sum"),
+        NegativeQuantity=("NegativeQuantity", "sum"),
+        Lines=("Revenue", "size"),
+        Transactions=("TransactionNo", "nunique"),
+    ).reset_index()
+
+    orders = lines.groupby(ORDER_DIMENSIONS, observed=True, sort=False).agg(
+        Transactions=("TransactionNo", "nunique"),
+    ).reset_index()
+
+    return SalesCube(products, orders)
+
+
+# Agregace kostky podle zvolených dimenzí.
+# where: rovnostní podmínky na dimenze, např. ReturnFlag=False, Country="France"
+def rollup(table, by, measures, **where):
+    for col, value in where.items():
+        table = table[table[col] == value]
+
+    if not by:
+        return table[measures].sum()
+    return table.groupby(by, observed=True)[measures].sum()
+
+
+# Přírůstek: dny, které v kostce ještě nejsou, se jen přidají. Dny, které
+# už v kostce jsou (přírůstek navazuje uprostřed dne), se přepočítají celé
+# z doplněné tabulky, aby seděly počty unikátních transakcí.
+def update_cube(cube, delta, merged):
+    days = delta["Date"].dt.normalize().unique()
+    overlap = cube.orders["Day"].isin(days)
+
+    if overlap.any():
+        recompute = merged[merged["Date"].dt.normalize().isin(days)]
+        products = cube.products[~cube.products["Day"].isin(days)]
+        orders = cube.orders[~overlap]
+    else:
+        recompute, products, orders = delta, cube.products, cube.orders
+
+    part = build_cube(recompute)
+    return SalesCube(
+        concat_compact([products, part.products]),
+        concat_compact([orders, part.orders]),
+    )
+
+
+# Sloučení dvou kostek z disjunktních částí dat. Platí jen tehdy, když žádná
+# transakce nezasahuje do obou částí (viz data.streaming).
+def merge_cubes(left, right):
+    products = concat_compact([left.products, right.products]) \
+        .groupby(PRODUCT_DIMENSIONS, observed=True, sort=False).sum().reset_index()
+    orders = concat_compact([left.orders, right.orders]) \
+        .groupby(ORDER_DIMENSIONS, observed=True, sort=False).sum().reset_index()
+    return SalesCube(products, orders)
+
+
+# Kostka má všechny dimenze globálního filtru - stačí vybrat její buňky
+def restrict_cube(cube, filters):
+    return SalesCube(
+        cube.products[frame_mask(cube.products, filters, date_column="Day")],
+        cube.orders[frame_mask(cube.orders, filters, date_column="Day")],
+    )
+
+
+register_aggregate("cube", build_cube, update_cube, merge_cubes, restrict_cube)
+
+
+# Kostka se staví jednou pro každou verzi dat a sdílí se mezi relacemi
+def load_cube(path=DATA_PATH):
+    with st.spinner("Building aggregates..."):
+        return dataset_store(path).aggregate("cube", current_filters())
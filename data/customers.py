@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.filters import current_filters
+from data.loader import dataset_store, register_aggregate
+from data.settings import DATA_PATH
+
+# DIMENZE ZÁKAZNÍKŮ
+# ------------------------------------------------------------------------------
+#
+# Jeden řádek na zákazníka, index CustomerNo (vyhledání přes .loc), seřazeno
+# sestupně podle tržeb - top N zákazníků je jen head(n):
+#
+#   Country          - země první objednávky (zákazník s více zeměmi má jednu)
+#   Revenue          - součet tržeb včetně vratek
+#   Orders           - počet unikátních transakcí
+#   ReturnedOrders   - počet transakcí s ReturnFlag
+#   ReturnedQuantity - vrácené kusy
+#   FirstPurchase / LastPurchase - datum první a poslední transakce
+#   Segment          - New (1 objednávka) / Returning (2-5) / Loyal (víc než 5)
+#
+# Všechny sloupce kromě segmentu jsou slučitelné (součet, min, max, země
+# s nejdřívější první objednávkou), takže dimenze jde stavět po částech
+# i doplňovat o přírůstky.
+
+SEGMENTS = ["New", "Returning", "Loyal"]
+SEGMENT_BINS = [0, 1, 5, np.inf]
+
+SUMMED_COLUMNS = ["Revenue", "Orders", "ReturnedOrders", "ReturnedQuantity"]
+
+
+def segment_of(orders):
+    return pd.cut(orders, SEGMENT_BINS, labels=SEGMENTS)
+
+
+def _finish(customers):
+    customers = customers.copy()
+    customers["Country"] = customers["Country"].astype("category")
+    customers["Segment"] = segment_of(customers["Orders"])
+    return customers.sort_values("Revenue", ascending=False, kind="stable")
+
+
+# Sloučení dílčích tabulek (stejný zákazník může být ve více částech)
+def _combine(parts):
+    rows = pd.concat([part.drop(columns="Segment") for part in parts])
+    # Po seřazení podle první objednávky vezme "first" zemi nejdřívější části
+    rows = rows.sort_values("FirstPurchase", kind="stable")
+    combined = rows.groupby(level="CustomerNo").agg({
+        "Country": "first",
+        **{col: "sum" for col in SUMMED_COLUMNS},
+        "FirstPurchase": "min",
+        "LastPurchase": "max",
+    })
+    return _finish(combined)
+
+
+def build_customers(df):
+    lines = df[df["CustomerNo"].notna()]
+
+    # Nejdřív transakce (jedna transakce = jeden zákazník), pak zákazníci
+    transactions = lines.groupby(["CustomerNo", "TransactionNo"], observed=True, sort=False).agg(
+        Country=("Country", "first"),
+        Date=("Date", "min"),
+        ReturnFlag=("ReturnFlag", "max"),
+        Revenue=("Revenue", "sum"),
+        ReturnedQuantity=("ReturnedQuantity", "sum"),
+    ).reset_index().sort_values("Date", kind="stable")
+
+    customers = transactions.groupby("CustomerNo", observed=True).agg(
+        Country=("Country", "first"),
+        Revenue=("Revenue", "sum"),
+        Orders=("TransactionNo", "size"),
+        ReturnedOrders=("ReturnFlag", "sum"),
+        ReturnedQuantity=("ReturnedQuantity", "sum"),
+        FirstPurchase=("Date", "min"),
+        LastPurchase=("Date", "max"),
+    )
+    return _finish(customers)
+
+
+# Přírůstek: zákazníci z přírůstku se přepočítají z doplněné tabulky
+# (jejich transakce mohla začít před přírůstkem), ostatní zůstávají
+def update_customers(customers, delta, merged):
+    touched = delta["CustomerNo"].dropna().unique()
+    recompute = merged[merged["CustomerNo"].isin(touched)]
+    kept = customers[~customers.index.isin(touched)]
+    return _combine([kept, build_customers(recompute)])
+
+
+# Sloučení z disjunktních částí dat (celé transakce, viz data.streaming)
+def merge_customers(left, right):
+    return _combine([left, right])
+
+
+register_aggregate("customers", build_customers, update_customers, merge_customers)
+
+
+def load_customers(path=DATA_PATH):
+    with st.spinner("Building aggregates..."):
+        return dataset_store(path).aggregate("customers", current_filters())
@@ -0,0 +1,83 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from data.schema import apply_schema, price_in_pounds
+
+# Odvozené sloupce - počítají se jednou při načtení datasetu, vektorově
+# ------------------------------------------------------------------------------
+#
+# Revenue          - Quantity * Price (v librách, float64)
+# ReturnedQuantity - vrácené kusy (absolutní hodnota) u řádků s ReturnFlag
+# SoldQuantity     - prodané kusy: bez vratek a bez záporných opravných řádků
+# AbsQuantity      - absolutní hodnota Quantity
+# YearMonth        - měsíc (Period "M")
+
+DERIVED_COLUMNS = ["Revenue", "ReturnedQuantity", "SoldQuantity", "AbsQuantity", "YearMonth"]
+
+
+def add_derived_columns(df):
+    df = df.copy(deep=False)
+
+    quantity = df["Quantity"].to_numpy()
+    returned = df["ReturnFlag"].to_numpy(dtype=bool)
+    abs_quantity = np.abs(quantity)
+
+    # float32 cena se před násobením vrací na přesné 2 desetinná místa,
+    # aby tržby odpovídaly hodnotám z CSV
+    price = price_in_pounds(df["Price"]).astype("float64").round(2).to_numpy()
+
+    df["Revenue"] = quantity * price
+    df["ReturnedQuantity"] = np.where(returned, abs_quantity, 0).astype(quantity.dtype)
+    df["SoldQuantity"] = np.where(~returned & (quantity > 0), quantity, 0).astype(quantity.dtype)
+    df["AbsQuantity"] = abs_quantity
+    df["YearMonth"] = df["Date"].dt.to_period("M")
+    return df
+
+
+# KONTROLA - porovnání s původními řádkovými výpočty (df.apply)
+# ------------------------------------------------------------------------------
+
+# Původní výpočty nad surovými daty z CSV (bez kompaktního schématu)
+def reference_columns(df):
+    return pd.DataFrame({
+        "Revenue": df["Quantity"] * df["Price"],
+        "ReturnedQuantity": df.apply(lambda row: abs(row["Quantity"]) if row["ReturnFlag"] else 0, axis=1),
+        "SoldQuantity": df.apply(lambda row: row["Quantity"] if not row["ReturnFlag"] and row["Quantity"] > 0 else 0, axis=1),
+        "AbsQuantity": df["Quantity"].abs(),
+        "YearMonth": df["Date"].dt.to_period("M"),
+    })
+
+
+def check_derived_columns(raw, money_as_pence=False):
+    derived = add_derived_columns(apply_schema(raw, money_as_pence=money_as_pence))
+    expected = reference_columns(raw)
+    mismatches = {}
+    for col in DERIVED_COLUMNS:
+        actual = derived[col]
+        if col == "Revenue":
+            equal = np.isclose(actual.to_numpy(), expected[col].to_numpy(), rtol=0, atol=1e-9)
+        else:
+            equal = (actual.to_numpy() == expected[col].to_numpy())
+        mismatches[col] = int((~equal).sum())
+    return mismatches
+
+
+# Spuštění: python -m data.derive [cesta_k_csv] [--sample N]
+if __name__ == "__main__":
+    from data.loader import read_csv
+    from data.settings import DATA_PATH, MONEY_AS_PENCE
+
+    args = sys.argv[1:]
+    sample = int(args[args.index("--sample") + 1]) if "--sample" in args else 100_000
+    paths = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] != "--sample")]
+
+    raw = read_csv(paths[0] if paths else DATA_PATH)
+    if len(raw) > sample:
+        raw = raw.sample(sample, random_state=0)
+
+    mismatches = check_derived_columns(raw, money_as_pence=MONEY_AS_PENCE)
+    for col, count in mismatches.items():
+        print(f"{col:<18} {'OK' if count == 0 else f'{count} mismatching rows'}")
+    sys.exit(1 if any(mismatches.values()) else 0)
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import threading
+
+import pandas as pd
+import streamlit as st
+import xlsxwriter
+
+from data.filters import current_filters
+from data.loader import data_version
+from data.profiling import current_run
+from data.settings import CACHE_DIR, DATA_PATH
+
+# EXPORT TABULEK DO EXCELU NA VYŽÁDÁNÍ
+# ------------------------------------------------------------------------------
+#
+# Soubor XLSX se nevytváří při každém vykreslení stránky, ale až po kliknutí
+# na tlačítko stažení (st.download_button s funkcí místo dat). Hotový soubor
+# se uloží do adresáře cache pod klíčem název exportu + verze dat + globální
+# filtr relace, takže další stažení stejné tabulky jen přečte soubor z disku. Zápis používá
+# režim constant_memory knihovny xlsxwriter - řádky se zapisují postupně
+# a v paměti je vždy jen jeden, bez ohledu na velikost tabulky.
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORT_DIR = os.path.join(CACHE_DIR, "exports")
+
+# Počet řádků převáděných najednou na Python hodnoty při zápisu
+WRITE_CHUNK_ROWS = 10_000
+
+# Formát hlavičky a dat odpovídá výstupu DataFrame.to_excel
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+
+# Sloupec jako pole Python hodnot, které xlsxwriter umí zapsat
+# (chybějící hodnoty jako None = prázdná buňka)
+def _cells(column):
+    if isinstance(column.dtype, pd.PeriodDtype):
+        column = column.astype(str)
+    values = column.to_numpy(dtype=object, copy=True)
+    values[column.isna().to_numpy()] = None
+    return values
+
+
+def write_xlsx(df, path, sheet_name="Sheet1"):
+    write_workbook({sheet_name: df}, path)
+
+
+# Sešit s více listy {název listu: DataFrame}. progress(podíl) se volá
+# po každé zapsané části řádků (pro zobrazení průběhu exportu na pozadí).
+def write_workbook(sheets, path, progress=None):
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    header = workbook.add_format(HEADER_FORMAT)
+    dates = workbook.add_format({"num_format": DATETIME_FORMAT})
+    total = max(1, sum(len(df) for df in sheets.values()))
+    written = 0
+
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.add_worksheet(sheet_name[:31])  # Excel povoluje max. 31 znaků
+        worksheet.write_row(0, 0, [str(col) for col in df.columns], header)
+        date_columns = [i for i, dtype in enumerate(df.dtypes) if pd.api.types.is_datetime64_any_dtype(dtype)]
+
+        for start in range(0, len(df), WRITE_CHUNK_ROWS):
+            part = df.iloc[start:start + WRITE_CHUNK_ROWS]
+            columns = [_cells(part[col]) for col in part.columns]
+            for offset, row in enumerate(zip(*columns)):
+                worksheet.write_row(start + offset + 1, 0, row)
+                for i in date_columns:
+                    if row[i] is not None:
+                        worksheet.write_datetime(start + offset + 1, i, row[i].to_pydatetime(), dates)
+            written += len(part)
+            if progress is not None:
+                progress(written / total)
+
+    workbook.close()
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode()).hexdigest()[:16]
+
+
+# Soubor exportu: <název>-<otisk verze>-<otisk filtru>.xlsx
+def _export_path(name, version, filters=None):
+    return os.path.join(EXPORT_DIR, f"{name}-{_digest((name, version))}-{_digest(filters)}.xlsx")
+
+
+# Bajty XLSX pro tabulku - z cache, nebo nově zapsané.
+# table: DataFrame, nebo funkce bez argumentů, která ho vrátí;
+# filters: globální filtr, pro který tabulka vznikla (data.filters)
+def excel_bytes(table, name, sheet_name, version, filters=None):
+    path = _export_path(name, version, filters)
+    if not os.path.exists(path):
+        df = table() if callable(table) else table
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        # Zápis do dočasného souboru a atomické přejmenování (souběžná stažení)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write_xlsx(df, tmp_path, sheet_name)
+        os.replace(tmp_path, path)
+        _remove_stale(name, version)
+
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# Exporty stejného názvu pro starší verze dat už nikdo nestáhne
+# (soubory aktuální verze pro jiné filtry zůstávají)
+def _remove_stale(name, version):
+    current = f"{name}-{_digest((name, version))}-"
+    for file_name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, file_name)
+        if file_name.startswith(f"{name}-") and file_name.endswith(".xlsx") and not file_name.startswith(current):
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Soubor mezitím smazal jiný proces
+
+
+# Tlačítko pro stažení tabulky jako XLSX. Soubor se vytvoří až po kliknutí.
+# name určuje klíč cache - musí se lišit pro každou tabulku, která závisí
+# na čemkoli jiném než na datech a globálním filtru (např. na výběru ve widgetu).
+def download_excel(label, table, file_name, sheet_name, name=None, path=DATA_PATH):
+    name = name or os.path.splitext(file_name)[0]
+    version, filters = data_version(path), current_filters()
+    run = current_run()
+    if run is not None:
+        run.exports.append((name, table, sheet_name))  # data.benchmark je změří zvlášť
+    st.download_button(
+        label=label,
+        data=lambda: excel_bytes(table, name, sheet_name, version, filters),
+        file_name=file_name,
+        mime=XLSX_MIME,
+        on_click="ignore",  # Stažení nevyvolá nové vykreslení stránky
+    )
@@ -0,0 +1,89 @@
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+import streamlit as st
+
+from data.filters import current_filters
+from data.loader import data_version
+from data.settings import DATA_PATH, FIGURE_CACHE_MB, FIGURE_CACHE_SIZE
+
+# CACHE GRAFŮ PODLE HODNOT WIDGETŮ
+# ------------------------------------------------------------------------------
+#
+# Funkce, které z agregace staví graf Plotly, se volají při každém rerunu
+# stránky, i když se změnil jiný widget. Dekorátor @memoized_figure(...) drží
+# hotové grafy v cache sdílené všemi relacemi; klíč je funkce, verze dat,
+# globální filtr a hodnoty vyjmenovaných argumentů (widgetů). Ostatní
+# argumenty (kostka, denní řada, souhrn) se do klíče nepočítají - jsou dané
+# verzí dat a filtrem.
+#
+# Cache je LRU s omezením počtu grafů (FIGURE_CACHE_SIZE) i velikosti
+# (FIGURE_CACHE_MB, měřeno délkou JSON grafu - tolik posílá st.plotly_chart).
+# Při změně verze dat se grafy starší verze zahodí. Vrácený graf je sdílený -
+# stránka ho smí jen zobrazit, ne upravovat.
+
+
+class FigureCache:
+    def __init__(self, max_entries=FIGURE_CACHE_SIZE, max_bytes=FIGURE_CACHE_MB * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()  # klíč -> (graf, velikost v bajtech)
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, version, key):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self.bytes = 0
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, version, key, fig):
+        size = len(pio.to_json(fig, validate=False))
+        if size > self.max_bytes:
+            return  # Graf větší než celá cache se neukládá
+        with self._lock:
+            if version != self._version or key in self._entries:
+                return  # Mezitím nová verze dat, nebo graf uložila jiná relace
+            self._entries[key] = (fig, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+
+# Jedna cache na proces, sdílená všemi relacemi
+@st.cache_resource
+def figure_cache():
+    return FigureCache()
+
+
+# Dekorátor - widgets jsou názvy argumentů, které tvoří klíč cache
+def memoized_figure(*widgets, path=DATA_PATH):
+    def decorate(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            version = data_version(path)
+            key = (fn.__module__, fn.__qualname__, current_filters(), *(bound.arguments[name] for name in widgets))
+
+            cache = figure_cache()
+            fig = cache.get(version, key)
+            if fig is None:
+                fig = fn(*args, **kwargs)
+                cache.put(version, key, fig)
+            return fig
+        return wrapper
+    return decorate
@@ -0,0 +1,142 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# GLOBÁLNÍ FILTR (období, země, vratky)
+# ------------------------------------------------------------------------------
+#
+# Filtr se nastavuje v postranním panelu a platí pro všechny stránky -
+# load_data, load_cube, load_daily, load_customers i load_overview vrací
+# data jen pro vybrané období, země a (ne)vratky.
+#
+# Řádky datasetu se vybírají přes index (FilterIndex), ne porovnáním celých
+# sloupců v každé sekci stránky:
+#   - pořadí řádků podle data (u exportu seřazeného vzestupně se nic neřadí),
+#     období je pak jen searchsorted -> souvislý rozsah
+#   - bitmapy řádků pro každou zemi a pro vratky (np.packbits, 1 bit na řádek)
+#     v tomto pořadí - výběr zemí je OR bitmap jen v rozsahu období
+# Předagregace, které mají filtrovatelné dimenze (kostka), se jen ořežou,
+# ostatní se postaví z vybraných řádků (viz DatasetStore.aggregate).
+
+# start / end - první a poslední den (datetime.date, včetně), None = bez omezení
+# countries   - seřazená n-tice zemí, prázdná = všechny
+# returns     - False = bez řádků s ReturnFlag
+Filters = namedtuple("Filters", ["start", "end", "countries", "returns"])
+
+
+def _day(value):
+    return np.datetime64(value, "D")
+
+
+def _bits(bitmap, lo, hi):
+    # Bity lo..hi-1 z bitmapy zabalené po bajtech
+    unpacked = np.unpackbits(bitmap[lo // 8:(hi + 7) // 8])
+    return unpacked[lo % 8:lo % 8 + hi - lo].view(bool)
+
+
+class FilterIndex:
+    def __init__(self, df):
+        dates = df["Date"].to_numpy()
+        # Pořadí řádků podle data; None = dataset už je seřazený
+        self.order = None if df["Date"].is_monotonic_increasing else np.argsort(dates, kind="stable")
+        self.dates = dates if self.order is None else dates[self.order]
+        self.rows = len(df)
+
+        countries = df["Country"].astype("category")
+        codes = countries.cat.codes.to_numpy()
+        returned = df["ReturnFlag"].to_numpy(dtype=bool)
+        if self.order is not None:
+            codes, returned = codes[self.order], returned[self.order]
+
+        self.countries = {
+            country: np.packbits(codes == code)
+            for code, country in enumerate(countries.cat.categories)
+        }
+        self.returns = np.packbits(returned)
+
+    # Pozice vybraných řádků v původním pořadí (slice, pokud jde o souvislý rozsah)
+    def positions(self, filters):
+        lo = 0 if filters.start is None else int(np.searchsorted(self.dates, _day(filters.start), "left"))
+        hi = self.rows if filters.end is None else \
+            int(np.searchsorted(self.dates, _day(filters.end) + np.timedelta64(1, "D"), "left"))
+        hi = max(lo, hi)
+
+        selected = None
+        if filters.countries:
+            selected = np.zeros(hi - lo, dtype=bool)
+            for country in filters.countries:
+                if country in self.countries:
+                    selected |= _bits(self.countries[country], lo, hi)
+        if not filters.returns:
+            kept = ~_bits(self.returns, lo, hi)
+            selected = kept if selected is None else selected & kept
+
+        if self.order is None:
+            return slice(lo, hi) if selected is None else lo + np.flatnonzero(selected)
+
+        # Zpět do původního pořadí řádků - přes masku, bez řazení pozic
+        rows = self.order[lo:hi] if selected is None else self.order[lo:hi][selected]
+        mask = np.zeros(self.rows, dtype=bool)
+        mask[rows] = True
+        return np.flatnonzero(mask)
+
+    def apply(self, df, filters):
+        positions = self.positions(filters)
+        if isinstance(positions, slice):
+            return df.iloc[positions]
+        return df.take(positions)
+
+
+# Stejný filtr jako maska nad libovolnou tabulkou se sloupci data, země
+# a příznaku vratky - pro části souboru při načítání po částech a pro kostku
+def frame_mask(df, filters, date_column="Date"):
+    mask = np.ones(len(df), dtype=bool)
+    if filters.start is not None or filters.end is not None:
+        days = df[date_column].to_numpy().astype("datetime64[D]")
+        if filters.start is not None:
+            mask &= days >= _day(filters.start)
+        if filters.end is not None:
+            mask &= days <= _day(filters.end)
+    if filters.countries:
+        mask &= df["Country"].isin(filters.countries).to_numpy()
+    if not filters.returns:
+        mask &= ~df["ReturnFlag"].to_numpy(dtype=bool)
+    return mask
+
+
+def current_filters():
+    return st.session_state.get("filters")
+
+
+# Filtr v postranním panelu. cube je nefiltrovaná kostka - z ní se berou
+# hranice období a seznam zemí. Výsledek se uloží do session_state
+# ("filters"), None znamená celý dataset.
+def render_filters(cube):
+    days = cube.orders["Day"]
+    first, last = days.min().date(), days.max().date()
+    countries = sorted(cube.orders["Country"].astype(str).unique())
+
+    with st.sidebar.expander("🔎 Filtr dat", expanded=current_filters() is not None):
+        period = st.date_input(
+            "Období", value=(first, last), min_value=first, max_value=last, key="filter_dates"
+        )
+        selected = st.multiselect("Země", countries, placeholder="Všechny země", key="filter_countries")
+        returns = st.checkbox("Zahrnout vratky", value=True, key="filter_returns")
+
+    # Během výběru rozsahu vrací date_input jen počáteční den
+    period = tuple(period) if isinstance(period, (tuple, list)) else (period,)
+    start = period[0] if period else first
+    end = period[1] if len(period) > 1 else last
+
+    filters = Filters(
+        start=None if start <= first else start,
+        end=None if end >= last else end,
+        countries=tuple(sorted(selected)),
+        returns=returns,
+    )
+    if filters == Filters(None, None, (), True):
+        filters = None
+    st.session_state["filters"] = filters
+    return filters
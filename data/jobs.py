@@ -0,0 +1,175 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from data.export import XLSX_MIME, write_workbook
+from data.filters import current_filters
+from data.loader import data_version
+from data.settings import CACHE_DIR, DATA_PATH, EXPORT_TTL_HOURS, EXPORT_WORKERS
+
+# EXPORTY NA POZADÍ
+# ------------------------------------------------------------------------------
+#
+# Velké sestavy (více listů, desetitisíce řádků) se nezapisují během
+# vykreslení stránky, ale ve frontě úloh sdílené všemi relacemi. Stránka
+# úlohu jen zařadí (queue_export), zápis běží ve vlákně a hotový soubor se
+# uloží do spool adresáře. Postranní panel (render_jobs) ukazuje průběh
+# úloh dané relace a po dokončení nabídne stažení.
+#
+# Stejná sestava (název + verze dat + globální filtr + parametry) se
+# zapisuje jen jednou - další požadavek dostane už běžící nebo hotovou
+# úlohu, i z jiné relace a i po restartu aplikace, dokud soubor ve spoolu
+# nevyprší.
+
+SPOOL_DIR = os.path.join(CACHE_DIR, "spool")
+
+# Interval obnovy průběhu v postranním panelu (sekundy)
+POLL_SECONDS = 2
+
+
+class ExportJob:
+    def __init__(self, key, name, file_name, path):
+        self.key = key
+        self.name = name
+        self.file_name = file_name
+        self.path = path
+        self.status = "queued"  # queued / running / done / failed
+        self.progress = 0.0
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def pending(self):
+        return self.status in ("queued", "running")
+
+
+class ExportQueue:
+    def __init__(self, spool_dir=SPOOL_DIR, workers=EXPORT_WORKERS, ttl_hours=EXPORT_TTL_HOURS):
+        self.spool_dir = spool_dir
+        self.ttl = ttl_hours * 3600
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+
+    # Zařazení sestavy. build() vrací {název listu: DataFrame} a volá se až
+    # ve vlákně fronty - nesmí tedy používat prvky Streamlitu.
+    def submit(self, name, build, file_name, params=(), version=None, filters=None):
+        self.expire()
+        key = hashlib.sha1(repr((name, version, filters, params)).encode()).hexdigest()[:16]
+        path = os.path.join(self.spool_dir, f"{name}-{key}.xlsx")
+
+        with self._lock:
+            job = self.jobs.get(key)
+            if job is not None and (job.pending or job.status == "done" and os.path.exists(path)):
+                return job
+
+            job = ExportJob(key, name, file_name, path)
+            self.jobs[key] = job
+            if os.path.exists(path):
+                # Soubor zapsaný dříve (např. před restartem aplikace)
+                job.status, job.progress, job.finished = "done", 1.0, os.path.getmtime(path)
+            else:
+                self._executor.submit(self._run, job, build)
+            return job
+
+    def _run(self, job, build):
+        job.status = "running"
+        tmp_path = f"{job.path}.{os.getpid()}.tmp"
+        try:
+            sheets = build()
+            os.makedirs(self.spool_dir, exist_ok=True)
+            write_workbook(sheets, tmp_path, progress=lambda share: setattr(job, "progress", share))
+            os.replace(tmp_path, job.path)
+            job.status, job.progress = "done", 1.0
+        except Exception as exc:  # Chyba se zobrazí u úlohy v postranním panelu
+            job.status, job.error = "failed", str(exc)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            job.finished = time.time()
+
+    # Smazání souborů a úloh starších než TTL
+    def expire(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for key, job in list(self.jobs.items()):
+                if not job.pending and job.finished < cutoff:
+                    del self.jobs[key]
+
+        if not os.path.isdir(self.spool_dir):
+            return
+        for file_name in os.listdir(self.spool_dir):
+            path = os.path.join(self.spool_dir, file_name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass  # Soubor mezitím smazal jiný proces
+
+
+# Fronta - jedna na proces, sdílená všemi relacemi
+@st.cache_resource
+def export_queue():
+    return ExportQueue()
+
+
+# Tlačítko, které zařadí sestavu do fronty. Úloha se zapamatuje v relaci,
+# průběh a stažení jsou v postranním panelu (render_jobs).
+def queue_export(label, name, build, file_name, params=(), path=DATA_PATH):
+    if not st.button(label, key=f"queue_export_{name}"):
+        return None
+
+    job = export_queue().submit(
+        name, build, file_name, params, version=data_version(path), filters=current_filters()
+    )
+    keys = st.session_state.setdefault("export_jobs", [])
+    if job.key not in keys:
+        keys.append(job.key)
+    st.info("Export byl zařazen do fronty - průběh a stažení najdete v postranním panelu.")
+    return job
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _jobs_list():
+    queue = export_queue()
+    jobs = [queue.jobs[key] for key in st.session_state.get("export_jobs", []) if key in queue.jobs]
+
+    for job in jobs:
+        st.markdown(f"**{job.file_name}**")
+        if job.pending:
+            st.progress(job.progress, text="Ve frontě" if job.status == "queued" else f"{job.progress:.0%}")
+        elif job.status == "failed":
+            st.error(f"Export selhal: {job.error}")
+        elif os.path.exists(job.path):
+            st.download_button(
+                label="📥 Stáhnout",
+                data=lambda path=job.path: _read(path),
+                file_name=job.file_name,
+                mime=XLSX_MIME,
+                on_click="ignore",
+                key=f"export_job_{job.key}",
+            )
+
+
+# Panel úloh v postranním panelu - volá se po vykreslení stránky, aby
+# zahrnul i úlohu zařazenou právě v tomto běhu. Dokud některá úloha běží,
+# panel se obnovuje sám (fragment) bez překreslení celé stránky.
+def render_jobs():
+    queue = export_queue()
+    keys = [key for key in st.session_state.get("export_jobs", []) if key in queue.jobs]
+    st.session_state["export_jobs"] = keys
+    if not keys:
+        return
+
+    pending = any(queue.jobs[key].pending for key in keys)
+    with st.sidebar.expander("📦 Exporty", expanded=True):
+        st.fragment(_jobs_list, run_every=POLL_SECONDS if pending else None)()
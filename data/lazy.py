@@ -0,0 +1,205 @@
+import streamlit as st
+
+from data.customers import SEGMENTS
+from data.loader import _sidecar_is_fresh, data_version, sidecar_path
+from data.settings import DATA_PATH
+
+# POLARS BACKEND (LAZY FRAMES)
+# ------------------------------------------------------------------------------
+#
+# Agregace z data.queries jako líné dotazy Polars. Každá tabulka je jeden plán
+# (LazyFrame) od čtení zdroje po výsledek - Polars v něm sloučí filtr,
+# výběr sloupců i seskupení, ze zdroje čte jen použité sloupce a počítá
+# ve více vláknech. Nic se nedrží v paměti mezi dotazy, plán se spustí
+# (collect) až pro konkrétní tabulku a filtr.
+#
+# Zdroj je binární kopie (Arrow IPC), pokud je aktuální, jinak CSV.
+# Sloupce plánu odpovídají pohledu `sales` v data.sql: Day (datum), Month
+# ('YYYY-MM'), ProductNo / TransactionNo / Country jako text, Revenue
+# = Quantity × cena v librách (zaokrouhlená na pence jako v data.derive).
+#
+# Volitelná závislost (pip install polars) - importuje se jen pro tento backend.
+
+# Sloupce, podle kterých se smí seskupovat
+GROUP_COLUMNS = {"Country", "ProductName", "ProductNo", "CustomerNo", "Month"}
+MEASURES = {"Quantity", "Revenue"}
+
+
+def _scan(path):
+    import polars as pl
+
+    sidecar = sidecar_path(path)
+    if _sidecar_is_fresh(path, sidecar):
+        source = pl.scan_ipc(sidecar)
+        day = pl.col("Date").dt.date()
+        returned = pl.col("ReturnFlag")
+    else:
+        source = pl.scan_csv(path, schema_overrides={
+            "TransactionNo": pl.String, "ProductNo": pl.String, "Date": pl.String, "ReturnFlag": pl.String,
+        })
+        day = pl.col("Date").str.strptime(pl.Date, "%d/%m/%Y")
+        returned = pl.col("ReturnFlag").str.to_lowercase() == "true"
+
+    if source.collect_schema()["Price"].is_integer():
+        price = pl.col("Price") / 100  # Celé pence (SALES_MONEY_AS_PENCE)
+    else:
+        price = pl.col("Price").cast(pl.Float64).round(2)
+
+    return source.select(
+        pl.col("TransactionNo").cast(pl.String),
+        day.alias("Day"),
+        day.dt.strftime("%Y-%m").alias("Month"),
+        pl.col("ProductNo").cast(pl.String),
+        pl.col("ProductName").cast(pl.String),
+        pl.col("Quantity").cast(pl.Int64),
+        pl.col("CustomerNo").cast(pl.Int64),
+        pl.col("Country").cast(pl.String),
+        returned.alias("ReturnFlag"),
+        (pl.col("Quantity") * price).alias("Revenue"),
+    )
+
+
+class PolarsBackend:
+    def __init__(self, path=DATA_PATH):
+        self.sales = _scan(path)  # Jen plán - zdroj se čte až při collect
+
+    # Řádky vybrané globálním filtrem (data.filters) a dalšími podmínkami
+    def _lines(self, filters, *conditions):
+        import polars as pl
+
+        predicates = list(conditions)
+        if filters is not None:
+            if filters.start is not None:
+                predicates.append(pl.col("Day") >= filters.start)
+            if filters.end is not None:
+                predicates.append(pl.col("Day") <= filters.end)
+            if filters.countries:
+                predicates.append(pl.col("Country").is_in(list(filters.countries)))
+            if not filters.returns:
+                predicates.append(~pl.col("ReturnFlag"))
+        return self.sales.filter(*predicates) if predicates else self.sales
+
+    def monthly_revenue(self, filters=None):
+        import polars as pl
+
+        sold, returned = ~pl.col("ReturnFlag"), pl.col("ReturnFlag")
+        plan = self._lines(filters).group_by("Month").agg(
+            pl.col("Revenue").filter(sold).sum().alias("Total_Revenue"),
+            pl.col("TransactionNo").filter(sold).n_unique().cast(pl.Int64).alias("Orders_Count"),
+            returned.sum().cast(pl.Int64).alias("Return_Count"),
+            pl.col("Revenue").filter(returned).sum().alias("Returned_Revenue"),
+            sold.sum().alias("Sales"),
+        ).filter(pl.col("Sales") > 0).sort("Month").select(
+            pl.col("Month").alias("Date"),
+            "Total_Revenue",
+            "Orders_Count",
+            (pl.col("Total_Revenue") / pl.col("Orders_Count")).round(2).alias("Average_Order_Value"),
+            "Return_Count",
+            "Returned_Revenue",
+            (pl.col("Total_Revenue") - pl.col("Returned_Revenue")).alias("Net_Revenue"),
+        )
+        return plan.collect().to_pandas()
+
+    def aov_by_country(self, filters=None):
+        import polars as pl
+
+        plan = self._lines(filters, ~pl.col("ReturnFlag")).group_by("Country").agg(
+            pl.col("Revenue").sum(),
+            pl.col("TransactionNo").n_unique().cast(pl.Int64).alias("Orders"),
+        ).with_columns(
+            (pl.col("Revenue") / pl.col("Orders")).alias("AOV"),
+        ).sort("AOV", descending=True)
+        return plan.collect().to_pandas()
+
+    def top_products(self, measure, n, filters=None):
+        import polars as pl
+
+        if measure not in MEASURES:
+            raise ValueError(f"unknown measure: {measure!r}")
+        lines = self._lines(filters)
+        top = lines.group_by("ProductNo").agg(pl.col(measure).sum().alias("Value")) \
+            .sort("Value", descending=True).head(n)
+        names = lines.select("ProductNo", "ProductName").unique()
+        plan = top.join(names, on="ProductNo", how="left", maintain_order="left") \
+            .select("ProductNo", "ProductName", "Value")
+        return plan.collect().to_pandas()
+
+    def return_rates(self, by, basis="flag", orders=False, filters=None):
+        import polars as pl
+
+        if by not in GROUP_COLUMNS:
+            raise ValueError(f"unknown grouping column: {by!r}")
+        quantity, revenue, flag = pl.col("Quantity"), pl.col("Revenue"), pl.col("ReturnFlag")
+        if basis == "flag":
+            sold = pl.when(~flag & (quantity > 0)).then(quantity).otherwise(0)
+            returned = pl.when(flag).then(quantity.abs()).otherwise(0)
+            returned_revenue = pl.when(flag).then(revenue.abs()).otherwise(0.0)
+        elif basis == "sign":
+            sold = pl.when(quantity > 0).then(quantity).otherwise(0)
+            returned = pl.when(quantity < 0).then(-quantity).otherwise(0)
+            returned_revenue = pl.when(quantity < 0).then(-revenue).otherwise(0.0)
+        else:
+            raise ValueError(f"unknown basis: {basis!r}")
+
+        # Objednávky jako unikátní dvojice (transakce, příznak vratky) - viz data.returns
+        order_counts = [
+            pl.col("TransactionNo").filter(~flag).n_unique().cast(pl.Int64).alias("Kept_Orders"),
+            pl.col("TransactionNo").filter(flag).n_unique().cast(pl.Int64).alias("Returned_Orders"),
+        ] if orders else []
+
+        plan = self._lines(filters, pl.col(by).is_not_null()).group_by(by).agg(
+            sold.sum().alias("Sold_Qty"),
+            returned.sum().alias("Returned_Qty"),
+            returned_revenue.sum().alias("Returned_Revenue"),
+            *order_counts,
+        ).with_columns(
+            pl.when(pl.col("Sold_Qty") != 0)
+              .then(pl.col("Returned_Qty") / pl.col("Sold_Qty") * 100)
+              .alias("Return Rate (%)"),
+        ).sort(by)
+        if orders:
+            plan = plan.select(
+                by, "Sold_Qty", "Returned_Qty", "Returned_Revenue", "Return Rate (%)",
+                (pl.col("Kept_Orders") + pl.col("Returned_Orders")).alias("Total_Orders"),
+                "Returned_Orders",
+                (pl.col("Returned_Orders") / (pl.col("Kept_Orders") + pl.col("Returned_Orders")) * 100)
+                    .alias("Order Return Rate (%)"),
+            )
+        return plan.collect().to_pandas()
+
+    def order_values(self, filters=None):
+        import polars as pl
+
+        plan = self._lines(filters).group_by("TransactionNo").agg(
+            pl.col("Revenue").sum().alias("TotalOrderValue"),
+        )
+        return plan.collect().to_pandas()
+
+    # Segmenty zákazníků podle počtu objednávek (hranice jako SEGMENT_BINS v data.customers)
+    def segment_summary(self, filters=None):
+        import polars as pl
+
+        customers = self._lines(filters, pl.col("CustomerNo").is_not_null()) \
+            .group_by("CustomerNo", "TransactionNo").agg(pl.col("Revenue").sum()) \
+            .group_by("CustomerNo").agg(pl.len().alias("Orders"), pl.col("Revenue").sum())
+        plan = customers.with_columns(
+            pl.when(pl.col("Orders") <= 1).then(pl.lit("New"))
+              .when(pl.col("Orders") <= 5).then(pl.lit("Returning"))
+              .otherwise(pl.lit("Loyal")).alias("Segment"),
+        ).group_by("Segment").agg(
+            pl.len().cast(pl.Int64).alias("Customers"),
+            pl.col("Orders").sum().cast(pl.Int64),
+            pl.col("Revenue").sum().alias("Total_Revenue"),
+        )
+        summary = plan.collect().to_pandas()
+        return summary.set_index("Segment").reindex(SEGMENTS, fill_value=0).reset_index()
+
+
+# Plán - jeden na verzi dat (nová verze = nová kontrola zdroje a schématu)
+@st.cache_resource(max_entries=2)
+def _backend(path, version):
+    return PolarsBackend(path)
+
+
+def polars_backend(path=DATA_PATH):
+    return _backend(path, data_version(path))
@@ -0,0 +1,298 @@
+import io
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import streamlit as st
+
+from data.artifacts import load_artifact
+from data.derive import add_derived_columns
+from data.filters import FilterIndex, current_filters, frame_mask
+from data.schema import align_schema, apply_schema, concat_compact
+from data.settings import CACHE_DIR, DATA_PATH, MAX_MEMORY_MB, MONEY_AS_PENCE
+from data.streaming import scan, streaming_enabled
+
+# Verze formátu binární kopie - zvýšit při změně odvozených sloupců,
+# aby se starší kopie automaticky přestavěly
+SIDECAR_VERSION = "3"
+
+
+# Otisk souboru - změna velikosti nebo času úpravy znamená novou verzi dat
+def data_version(path=DATA_PATH):
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+# Cesta k binární (Arrow IPC) kopii CSV v adresáři cache
+def sidecar_path(path=DATA_PATH):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{name}.arrow")
+
+
+# Značka uložená v kopii - verze formátu a způsob uložení cen
+def _sidecar_tag():
+    return f"{SIDECAR_VERSION}-{'pence' if MONEY_AS_PENCE else 'float'}".encode()
+
+
+# Verze předpočítaných výsledků (data.artifacts) - otisk dat a formát
+def artifact_version(path=DATA_PATH):
+    return f"{data_version(path)}-{_sidecar_tag().decode()}"
+
+
+# Parsování CSV (jen typ data, ostatní typy řeší schéma)
+def read_csv(path):
+    df = pd.read_csv(path)
+    df["Date"] = pd.to_datetime(df["Date"], format="%d/%m/%Y")  # Oprava typu
+    return df
+
+
+# Kopie je aktuální, jen pokud vznikla z přesně této verze CSV - porovnání
+# časů úprav nestačí (cp -p, rsync -t nebo git checkout vrátí starší čas)
+def _sidecar_is_fresh(path, sidecar):
+    if not os.path.exists(sidecar):
+        return False
+    metadata = feather.read_table(sidecar, memory_map=True).schema.metadata or {}
+    return (metadata.get(b"sidecar_version") == _sidecar_tag()
+            and metadata.get(b"data_version") == data_version(path).encode())
+
+
+def _write_sidecar(df, sidecar, version):
+    os.makedirs(os.path.dirname(sidecar) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"sidecar_version": _sidecar_tag(),
+        b"data_version": version.encode(),
+    })
+    # Zápis do dočasného souboru a atomické přejmenování - souběžně běžící
+    # proces nikdy neuvidí rozepsanou kopii
+    tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+    # Bez komprese, aby šel soubor číst přes memory-map bez dekódování
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, sidecar)
+
+
+# Načtení datasetu: z binární kopie, pokud je aktuální, jinak z CSV
+# (a kopie se při tom vytvoří pro příští start)
+def read_dataset(path=DATA_PATH):
+    sidecar = sidecar_path(path)
+    if _sidecar_is_fresh(path, sidecar):
+        table = feather.read_table(sidecar, memory_map=True)
+        return table.to_pandas(split_blocks=True)
+
+    version = data_version(path)  # Před čtením - soubor se mezitím může změnit
+    df = apply_schema(read_csv(path), money_as_pence=MONEY_AS_PENCE)
+    try:
+        _write_sidecar(df, sidecar, version)
+    except OSError:
+        pass  # Adresář cache není zapisovatelný - pokračujeme bez kopie
+    return df
+
+
+# PŘÍRŮSTKOVÉ NAČÍTÁNÍ
+# ------------------------------------------------------------------------------
+#
+# Export se denně doplňuje o nové řádky na konec souboru. Stav načteného
+# datasetu (DatasetStore) si pamatuje, kolik bajtů CSV už zpracoval, a při
+# změně souboru ověří, že původní obsah zůstal beze změny (otisk posledních
+# bajtů). Pak načte jen nově připsané řádky a přidá je k tabulce i ke všem
+# už spočítaným agregacím. Jakákoli jiná změna souboru znamená úplné načtení.
+
+# Kolik bajtů před koncem zpracované části se kontroluje
+TAIL_BYTES = 4096
+
+# Registr předagregací, které se umí aktualizovat o přírůstek
+# build(df) -> hodnota, update(hodnota, delta, merged) -> nová hodnota,
+# merge(hodnota, hodnota) -> sloučení dílčích hodnot (pro načítání po částech),
+# restrict(hodnota, filters) -> hodnota jen pro globální filtr (data.filters)
+Aggregate = namedtuple("Aggregate", ["build", "update", "merge", "restrict"])
+AGGREGATES = {}
+
+# Počet naposledy použitých filtrovaných agregací, které se drží v paměti
+FILTERED_CACHE_SIZE = 8
+
+
+def register_aggregate(name, build, update=None, merge=None, restrict=None):
+    # Bez update se agregace při přírůstku postaví znovu z celé tabulky,
+    # bez merge ji nejde počítat po částech a vždy potřebuje celý dataset,
+    # bez restrict se pro filtr postaví znovu z vybraných řádků
+    AGGREGATES[name] = Aggregate(build, update or (lambda value, delta, merged: build(merged)), merge, restrict)
+
+
+def _read_tail(path, end):
+    with open(path, "rb") as f:
+        f.seek(max(0, end - TAIL_BYTES))
+        return f.read(end - max(0, end - TAIL_BYTES))
+
+
+class DatasetStore:
+    def __init__(self, path):
+        self.path = path
+        self.df = None
+        self.version = None
+        self.watermark = None  # Nejnovější datum v načtených datech
+        self._lock = threading.RLock()
+        self._size = 0  # Počet zpracovaných bajtů CSV
+        self._tail = b""
+        self._columns = None
+        self._aggregates = {}
+        self._streamed = {}  # Agregace spočítané po částech (bez načtení datasetu)
+        self._streamed_version = None
+        self._index = None  # FilterIndex - staví se při prvním filtrování
+        self._filtered = OrderedDict()  # (název, filtr) -> agregace, LRU
+        self._filtered_version = None
+        self._filtered_rows = None  # (filtr, vybrané řádky) - poslední výběr
+
+    def refresh(self):
+        version = data_version(self.path)
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            if self.df is not None and self._is_append():
+                try:
+                    self._ingest_delta()
+                except (TypeError, ValueError):
+                    self._full_load()  # Přírůstek nejde sladit se schématem
+            else:
+                self._full_load()
+            self.version = version
+
+    def aggregate(self, name, filters=None):
+        if filters is not None:
+            return self._filtered_aggregate(name, filters)
+        # Předpočítaná agregace pro aktuální verzi dat - dataset se nenačítá
+        value = load_artifact(self.path, artifact_version(self.path), f"aggregate-{name}")
+        if value is not None:
+            return value
+        if AGGREGATES[name].merge is not None and streaming_enabled(self.path):
+            return self._streamed_aggregate(name)
+        self.refresh()
+        with self._lock:
+            if name not in self._aggregates:
+                self._aggregates[name] = AGGREGATES[name].build(self.df)
+            return self._aggregates[name]
+
+    # Agregace se počítají průchodem souboru po částech. Průchod pro novou
+    # agregaci spočítá zároveň všechny dříve vyžádané, aby se při změně dat
+    # soubor četl jen jednou. Při jakékoli změně souboru se průchod opakuje
+    # celý - přírůstek by mohl navazovat uprostřed transakce a počty unikátních
+    # transakcí by neseděly.
+    def _streamed_aggregate(self, name):
+        version = data_version(self.path)
+        with self._lock:
+            if version != self._streamed_version or name not in self._streamed:
+                names = {name, *self._streamed}
+                self._streamed = scan(self.path, {n: AGGREGATES[n] for n in names}, MAX_MEMORY_MB)
+                self._streamed_version = version
+            return self._streamed[name]
+
+    # Řádky datasetu pro filtr (None = celý dataset)
+    def rows(self, filters=None):
+        if filters is None:
+            self.refresh()
+            return self.df
+        return self.filtered(filters)
+
+    # Řádky datasetu vybrané filtrem (přes FilterIndex, bez prohledání sloupců)
+    def filtered(self, filters):
+        self.refresh()
+        with self._lock:
+            if self._filtered_rows is None or self._filtered_rows[0] != filters:
+                if self._index is None:
+                    self._index = FilterIndex(self.df)
+                self._filtered_rows = (filters, self._index.apply(self.df, filters))
+            return self._filtered_rows[1]
+
+    # Agregace pro globální filtr: ořezání hotové agregace (restrict), jinak
+    # stavba z vybraných řádků - po částech souboru s maskou filtru, pokud se
+    # dataset nenačítá celý. Výsledky se drží v malé LRU cache pro verzi dat.
+    def _filtered_aggregate(self, name, filters):
+        agg = AGGREGATES[name]
+        version = data_version(self.path)
+        with self._lock:
+            if version != self._filtered_version:
+                self._filtered.clear()
+                self._filtered_version = version
+            key = (name, filters)
+            if key in self._filtered:
+                self._filtered.move_to_end(key)
+                return self._filtered[key]
+
+        if agg.restrict is not None:
+            value = agg.restrict(self.aggregate(name), filters)
+        elif agg.merge is not None and streaming_enabled(self.path):
+            masked = agg._replace(build=lambda chunk: agg.build(chunk[frame_mask(chunk, filters)]))
+            value = scan(self.path, {name: masked}, MAX_MEMORY_MB)[name]
+        else:
+            value = agg.build(self.filtered(filters))
+
+        with self._lock:
+            self._filtered[key] = value
+            while len(self._filtered) > FILTERED_CACHE_SIZE:
+                self._filtered.popitem(last=False)
+        return value
+
+    def _full_load(self):
+        size = os.path.getsize(self.path)
+        self._columns = list(pd.read_csv(self.path, nrows=0).columns)
+        self.df = add_derived_columns(read_dataset(self.path))
+        self._size = size
+        self._tail = _read_tail(self.path, size)
+        self._aggregates = {}
+        self._index = None
+        self._filtered_rows = None
+        self.watermark = self.df["Date"].max()
+
+    # Soubor jen narostl a dosavadní obsah končí celým řádkem
+    def _is_append(self):
+        if os.path.getsize(self.path) <= self._size:
+            return False
+        tail = _read_tail(self.path, self._size)
+        return tail == self._tail and tail.endswith(b"\n")
+
+    def _ingest_delta(self):
+        with open(self.path, "rb") as f:
+            f.seek(self._size)
+            chunk = f.read()
+
+        # Zpracují se jen celé řádky - rozepsaný poslední řádek počká na další běh
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return
+
+        raw = pd.read_csv(io.BytesIO(chunk[:end]), header=None, names=self._columns)
+        raw["Date"] = pd.to_datetime(raw["Date"], format="%d/%m/%Y")  # Oprava typu
+        delta = apply_schema(raw, money_as_pence=MONEY_AS_PENCE)
+        delta = add_derived_columns(align_schema(delta, self.df))
+        merged = concat_compact([self.df, delta])
+
+        self._aggregates = {
+            name: AGGREGATES[name].update(value, delta, merged)
+            for name, value in self._aggregates.items()
+        }
+        self.df = merged
+        self._index = None
+        self._filtered_rows = None
+        self._size += end
+        self._tail = _read_tail(self.path, self._size)
+        self.watermark = max(self.watermark, delta["Date"].max())
+
+
+# Stav datasetu - jeden na proces, sdílený všemi relacemi
+@st.cache_resource
+def dataset_store(path=DATA_PATH):
+    return DatasetStore(path)
+
+
+def load_data(path=DATA_PATH):
+    store = dataset_store(path)
+    with st.spinner("Loading dataset..."):
+        df = store.rows(current_filters())
+    # Mělká kopie - stránky si mohou přidávat vlastní sloupce,
+    # aniž by měnily sdílený DataFrame v cache
+    return df.copy(deep=False)
@@ -0,0 +1,117 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.filters import current_filters
+from data.loader import dataset_store, register_aggregate
+from data.settings import DATA_PATH
+from data.sketch import HyperLogLog, approximate_counts
+
+# Souhrnné KPI (General Overview) jako slučitelný stav
+# ------------------------------------------------------------------------------
+#
+# Stav se dá postavit z libovolné části dat a dva stavy se dají sloučit, takže
+# stejný kód slouží pro celý dataset v paměti, pro načítání po částech
+# i pro přírůstky. Unikátní hodnoty se drží jako seřazená pole (přesně),
+# nebo jako sketch HyperLogLog (přibližně, s pevnou velikostí).
+
+DISTINCT_COLUMNS = {
+    "transactions": "TransactionNo",
+    "products": "ProductNo",
+    "customers": "CustomerNo",
+}
+
+
+# Unikátní hodnoty sloupce - celá čísla zůstávají čísly, ostatní jako text
+def _distinct(series):
+    series = series.dropna()
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return np.unique(series.to_numpy(dtype="int64"))
+    return np.unique(series.astype(str).to_numpy(dtype=object))
+
+
+def _union(left, right):
+    if left.dtype != right.dtype:
+        # Smíšené typy (část souboru s číselnými, část s textovými ID)
+        left, right = left.astype(str).astype(object), right.astype(str).astype(object)
+    return np.union1d(left, right)
+
+
+class OverviewState:
+    def __init__(self, approx=False):
+        self.approx = approx
+        if approx:
+            self.distinct = {name: HyperLogLog() for name in DISTINCT_COLUMNS}
+        else:
+            self.distinct = {name: np.array([], dtype="int64") for name in DISTINCT_COLUMNS}
+        self.lines = 0
+        self.revenue = 0.0
+        self.first_date = None
+        self.last_date = None
+
+    @classmethod
+    def from_frame(cls, df, approx=False):
+        state = cls(approx)
+        for name, col in DISTINCT_COLUMNS.items():
+            if approx:
+                state.distinct[name].update(df[col])
+            else:
+                state.distinct[name] = _distinct(df[col])
+        state.lines = int(df["TransactionNo"].count())
+        state.revenue = float(df["Revenue"].sum())
+        if len(df):
+            state.first_date = df["Date"].min()
+            state.last_date = df["Date"].max()
+        return state
+
+    def merge(self, other):
+        merged = OverviewState(self.approx)
+        for name in DISTINCT_COLUMNS:
+            if self.approx:
+                merged.distinct[name] = self.distinct[name].merge(other.distinct[name])
+            else:
+                merged.distinct[name] = _union(self.distinct[name], other.distinct[name])
+        merged.lines = self.lines + other.lines
+        merged.revenue = self.revenue + other.revenue
+        dates = [d for d in (self.first_date, other.first_date) if d is not None]
+        merged.first_date = min(dates) if dates else None
+        dates = [d for d in (self.last_date, other.last_date) if d is not None]
+        merged.last_date = max(dates) if dates else None
+        return merged
+
+    def count(self, name):
+        if self.approx:
+            return self.distinct[name].count()
+        return len(self.distinct[name])
+
+    def kpis(self):
+        return {
+            "unique_transactions": self.count("transactions"),
+            "unique_products": self.count("products"),
+            "unique_customers": self.count("customers"),
+            "lines": self.lines,
+            "total_sales": self.revenue,
+            "first_date": self.first_date,
+            "last_date": self.last_date,
+            # Směrodatná relativní chyba unikátních počtů (None = přesné)
+            "distinct_error": self.distinct["transactions"].relative_error if self.approx else None,
+        }
+
+
+for name, approx in [("overview", False), ("overview_approx", True)]:
+    build = partial(OverviewState.from_frame, approx=approx)
+    register_aggregate(
+        name,
+        build,
+        update=lambda state, delta, merged, build=build: state.merge(build(delta)),
+        merge=OverviewState.merge,
+    )
+
+
+def load_overview(path=DATA_PATH, approx=None):
+    if approx is None:
+        approx = approximate_counts()
+    with st.spinner("Computing overview..."):
+        return dataset_store(path).aggregate("overview_approx" if approx else "overview", current_filters()).kpis()
@@ -2,285 +2,347 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-from io import BytesIO
 import plotly.graph_objects as go
 
-# Hlavní nadpis a popis sekce
-st.markdown("""
-    <h1 style="text-align: center;">Sales Transaction Analysis</h1>
-    <h3 style="text-align: center; color: #555;">Anomalies & Issues Detection</h3>
-    <div style="padding: 15px; border-radius: 10px; text-align: center;">
-    <p style="font-size: 16px;">     
-        This section is dedicated to identifying unusual patterns and potential data issues 
-        in sales transactions. It highlights products and customers with high return rates, 
-        unusually large orders, negative values, and other anomalies that may indicate 
-        data quality problems, fraud, or operational inefficiencies.
-    </p>
-    </div>
-""", unsafe_allow_html=True)
-
-# Načtení datasetu
-df = pd.read_csv("cleaned_sales_data.csv", parse_dates=["Date"])
-df["Date"] = pd.to_datetime(df["Date"], format="%d/%m/%Y")  # Oprava typu
-df["Revenue"] = df["Quantity"] * df["Price"]
-
-st.divider()  # Oddělovač
-# ------------------------------------------------------------
-
-st.markdown("""
-### Negative Revenue Without Return Flag
-
-In this check, we look for transactions where revenue is negative,  
-but they are **not marked as returns**. These cases could indicate:
-- Data entry errors (e.g. wrong quantity or price)
-- System glitches
-- Misclassified transactions
-
-Only records with negative receipts and not marked as returns are shown below.
-""")
-
-# Vyfiltrování podezřelých záznamů
-negative_revenue_issues = df[(df["Revenue"] < 0) & (df["ReturnFlag"] != True)]
-
-# Zobrazení tabulky, pokud něco najdeme
-if not negative_revenue_issues.empty:
-    st.warning(f"{len(negative_revenue_issues)} suspicious records found with negative revenue and no return flag.")
-    st.dataframe(negative_revenue_issues[["Date", "CustomerNo", "ProductName", "Quantity", "Price", "Revenue", "ReturnFlag", "Country"]], use_container_width=True)
-else:
-    st.success("✅ No issues found. All negative revenue transactions are properly marked as returns.")
-
-st.divider()  # Oddělovač
-# ------------------------------------------------------------
-
-st.markdown("""
-### Products with High Return Rate
-
-This check identifies products with an unusually high return rate.  
-A high return rate might indicate issues such as:
-- poor product quality  
-- misleading descriptions  
-- mismatched expectations  
-- or even technical problems
-
-We calculate the return rate as the percentage of returned units out of total units sold.
-Only products with **return rate above 30%** are shown.
-""")
-
-# Vynechání záporných quantity při prodeji (např. ručně odepsané položky)
-df["ReturnedQuantity"] = df.apply(lambda row: abs(row["Quantity"]) if row["ReturnFlag"] else 0, axis=1)
-df["SoldQuantity"] = df.apply(lambda row: row["Quantity"] if not row["ReturnFlag"] and row["Quantity"] > 0 else 0, axis=1)
-
-# Výpočet agregací
-product_returns = df.groupby("ProductName").agg(
-    Total_Sold=("SoldQuantity", "sum"),
-    Returned=("ReturnedQuantity", "sum")
-).reset_index()
-
-# Výpočet podílu vratek
-product_returns["Return Rate (%)"] = (
-    product_returns["Returned"] / product_returns["Total_Sold"].replace(0, np.nan) * 100
-).round(2)
-
-# Vyčištění
-product_returns = product_returns.dropna()
-product_returns = product_returns[product_returns["Total_Sold"] > 0]
-
-# Filtrování produktů s vysokou vratkovostí
-high_return_products = product_returns[product_returns["Return Rate (%)"] > 30].sort_values(by="Return Rate (%)", ascending=False)
-
-# Výstup: varování nebo tabulka
-if not high_return_products.empty:
-    st.warning(f"{len(high_return_products)} product(s) with return rate above 30%.")
-    st.dataframe(high_return_products, use_container_width=True)
-
-    # Poznámka pod tabulkou
-    st.markdown("""
-    ⚠️ **Note:** Due to the dataset representing only a partial time period,  
-    some products may appear with a return rate above 100% — this can happen  
-    when returns are recorded but the corresponding sale is outside of the dataset.
-    """)
-
-    # Funkce pro export do Excelu
-    def to_excel(df):
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='High Return Rate Products')
-        return output.getvalue()
-
-    excel_file = to_excel(high_return_products)
-
-    # Tlačítko pro stažení
-    st.download_button(
-        label="📥 Download Excel",
-        data=excel_file,
-        file_name="high_return_rate_products.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-
-else:
-    st.success("✅ No products found with return rate above 30%.")
-
-
-st.divider()  # Oddělovač
-# ------------------------------------------------------------
-
-st.markdown("""
-### Customers with Excessive Returns
-
-In this check, we analyze customers who have returned a high number of orders  
-compared to their total number of purchases. This might indicate:
-- frequent dissatisfaction
-- potential abuse of return policy
-- or inconsistencies in transaction labeling
-
-The table below shows customers with a **return rate over 30%**.
-""")
-
-# Unikátní objednávky s informací, zda byly vráceny
-unique_orders = df[["TransactionNo", "CustomerNo", "ReturnFlag"]].drop_duplicates()
-
-# Počet objednávek a počet vrácených objednávek na zákazníka
-customer_returns = unique_orders.groupby("CustomerNo").agg(
-    Total_Orders=("TransactionNo", "count"),
-    Returned_Orders=("ReturnFlag", "sum")
-).reset_index()
-
-# Výpočet return rate
-customer_returns["Return Rate (%)"] = (
-    customer_returns["Returned_Orders"] / customer_returns["Total_Orders"].replace(0, np.nan) * 100
-).round(2)
-
-# Výběr podezřelých
-high_return_customers = customer_returns[customer_returns["Return Rate (%)"] > 30].sort_values(by="Return Rate (%)", ascending=False)
-
-# Výstup
-if not high_return_customers.empty:
-    st.warning(f"{len(high_return_customers)} customers found with return rate above 30%.")
-    st.dataframe(high_return_customers, use_container_width=True)
-else:
-    st.success("✅ No customers found with excessive return rates.")
-
-# Volitelná poznámka
-st.markdown("""
-⚠️ **Note:** These customers have a return rate above 30%.  
-Further analysis may be needed to understand the cause (e.g., product issues, abuse, or data gaps).
-""")
-
-# Funkce pro export do Excelu
-def to_excel_customers(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='High Return Rate Customers')
-    return output.getvalue()
-
-excel_data_customers = to_excel_customers(high_return_customers)
-
-# Tlačítko pro stažení
-st.download_button(
-    label="📥 Download Customer Return Data",
-    data=excel_data_customers,
-    file_name="high_return_rate_customers.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-)
-
-st.divider()  # Oddělovač
-# ------------------------------------------------------------
-
-# OUTLIERS IN ORDER VALUE
-# ------------------------------------------------------------------------------
-
-st.markdown("### Outliers in Order Value")
-st.markdown("""
-This section helps identify unusually high or low order values.  
-Such outliers might indicate errors, fraud, or exceptional customers.
-""")
-
-# Výpočet celkové hodnoty objednávky (na základě TransactionNo)
-order_values = df.groupby("TransactionNo")["Revenue"].sum().reset_index()
-order_values.columns = ["TransactionNo", "TotalOrderValue"]
-
-# BOX PLOT – pro detekci outlierů
-box_fig = px.box(
-    order_values,
-    y="TotalOrderValue",
-    points="outliers",  # zobrazí outliery jako body
-    title="Box Plot of Total Order Value",
-    template="plotly_white"
+from data.anomalies import (
+    RETURN_RATE_LIMIT,
+    high_return_customers,
+    high_return_products,
+    load_unflagged_negatives,
+    top_orders,
 )
-st.plotly_chart(box_fig, use_container_width=True)
+from data.export import download_excel
+from data.filters import current_filters
+from data.jobs import queue_export
+from data.loader import dataset_store
+from data.profiling import profiled, section
+from data.queries import query
+from data.schema import price_in_pounds
+
+
+# Všechny objednávky s hodnotou od min_value včetně data, zákazníka a země.
+# Volá se ve vlákně fronty exportů (data.jobs), ne při vykreslení stránky.
+def orders_above(df, min_value):
+    orders = df.groupby("TransactionNo", observed=True).agg(
+        Date=("Date", "min"),
+        CustomerNo=("CustomerNo", "first"),
+        Country=("Country", "first"),
+        Lines=("Revenue", "size"),
+        TotalOrderValue=("Revenue", "sum"),
+    ).reset_index()
+    orders = orders[orders["TotalOrderValue"] >= min_value]
+    return orders.sort_values(by="TotalOrderValue", ascending=False)
+
+
+# Maximální počet bodů outlierů v box plotu - velikost grafu nezávisí na počtu objednávek
+MAX_OUTLIER_POINTS = 1000
+
+
+# BOX PLOT z předem spočítaných statistik (kvartily, Tukeyho vousy 1.5 × IQR).
+# Do prohlížeče jde jen pět čísel a nejvýše MAX_OUTLIER_POINTS outlierů -
+# při větším počtu rovnoměrně vybraných přes seřazené hodnoty (vč. extrémů).
+@profiled()
+def generate_order_value_box(values):
+    values = np.sort(np.asarray(values, dtype="float64"))
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+
+    # Vousy končí na nejkrajnějších hodnotách uvnitř hranic (jako v Plotly)
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    lower, upper = inside[0], inside[-1]
+
+    outliers = values[(values < lower) | (values > upper)]
+    if len(outliers) > MAX_OUTLIER_POINTS:
+        outliers = outliers[np.linspace(0, len(outliers) - 1, MAX_OUTLIER_POINTS).round().astype(int)]
+
+    name = "TotalOrderValue"
+    fig = go.Figure()
+    fig.add_trace(go.Box(
+        x=[name], q1=[q1], median=[median], q3=[q3],
+        lowerfence=[lower], upperfence=[upper],
+        name=name, boxpoints=False, marker_color="#636efa",
+    ))
+    fig.add_trace(go.Scatter(
+        x=[name] * len(outliers), y=outliers,
+        mode="markers", name="Outliers", marker=dict(color="#636efa", size=5),
+        hovertemplate="TotalOrderValue=%{y:,.2f}<extra></extra>",
+    ))
+    fig.update_layout(
+        title="Box Plot of Total Order Value",
+        template="plotly_white",
+        showlegend=False,
+        yaxis_title="TotalOrderValue",
+    )
+    return fig
+
+
+# HISTOGRAM z četností spočítaných v NumPy (50 stejně širokých košů),
+# osa Y logaritmická - do prohlížeče jde jen 50 sloupců
+@profiled()
+def generate_order_value_histogram(values, bins=50):
+    counts, edges = np.histogram(np.asarray(values, dtype="float64"), bins=bins)
+
+    fig = go.Figure(data=[go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        marker_color="#636efa",
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate="TotalOrderValue=%{customdata[0]:,.0f} – %{customdata[1]:,.0f}<br>count=%{y}<extra></extra>",
+    )])
+    fig.update_layout(
+        title="Distribution of Total Order Value (Log-Scaled Y)",
+        template="plotly_white",
+        xaxis_title="TotalOrderValue",
+        yaxis_title="count",
+        yaxis_type="log",
+        bargap=0,
+    )
+    return fig
 
-with st.expander("ℹ️ What does this chart show?"):
-    st.markdown("""
-    - **Box Plot:** This chart shows the overall spread of total order values.  
-      The dots outside the box are considered **outliers** – unusually high or low values compared to most orders.
-      
-    These charts help detect suspiciously large orders or potential errors in the data.
-    """)
-
-# HISTOGRAM – pro přehled rozložení (s logaritmickou osou Y)
-hist_fig = px.histogram(
-    order_values,
-    x="TotalOrderValue",
-    nbins=50,
-    title="Distribution of Total Order Value (Log-Scaled Y)",
-    template="plotly_white",
-    log_y=True
-)
-st.plotly_chart(hist_fig, use_container_width=True)
 
-with st.expander("ℹ️ What does this chart show?"):
+def render():
+    # Hlavní nadpis a popis sekce
     st.markdown("""
-        
-    - **Histogram:** This chart shows how often different order values occur.  
-      The **logarithmic Y-axis** helps highlight even rare or extreme values that would otherwise be hard to see.
-      
-    These charts help detect suspiciously large orders or potential errors in the data.
-    """)
-
-st.divider()  # Oddělovač
-# ------------------------------------------------------------
-
-# Výpočet hranice pro horní 1 % objednávek
-threshold = order_values["TotalOrderValue"].quantile(0.99)
-formatted_threshold = f"{int(round(threshold)):,}".replace(",", " ") + " £"
-
-# Výběr objednávek nad touto hranicí
-top_orders = order_values[order_values["TotalOrderValue"] >= threshold].sort_values(
-    by="TotalOrderValue", ascending=False
-)
-
-# Formátování čísel do čitelné podoby
-top_orders["TotalOrderValue"] = top_orders["TotalOrderValue"].apply(
-    lambda x: f"{int(round(x)):,}".replace(",", " ") + " £"
-)
-
-# Popis
-st.markdown("### Top 1% Orders by Value")
-st.markdown(
-    f"""
-    These are the top 1% of orders with the highest total value.  
-    They may indicate **bulk purchases**, **corporate buyers**, or **potential anomalies**.
-
-    - Threshold for top 1%: **{formatted_threshold}**
-    """
-)
-
-# Zobrazení tabulky
-st.dataframe(top_orders, use_container_width=True)
-
-# Funkce pro export do Excelu
-def to_excel_top_orders(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Top 1 Percent Orders')
-    return output.getvalue()
-
-excel_data_top_orders = to_excel_top_orders(top_orders)
-
-# Tlačítko pro stažení
-st.download_button(
-    label="📥 Download Top 1% Orders as Excel",
-    data=excel_data_top_orders,
-    file_name="top_1_percent_orders.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-)
+        <h1 style="text-align: center;">Sales Transaction Analysis</h1>
+        <h3 style="text-align: center; color: #555;">Anomalies & Issues Detection</h3>
+        <div style="padding: 15px; border-radius: 10px; text-align: center;">
+        <p style="font-size: 16px;">     
+            This section is dedicated to identifying unusual patterns and potential data issues 
+            in sales transactions. It highlights products and customers with high return rates, 
+            unusually large orders, negative values, and other anomalies that may indicate 
+            data quality problems, fraud, or operational inefficiencies.
+        </p>
+        </div>
+    """, unsafe_allow_html=True)
+
+    st.divider()  # Oddělovač
+    # ------------------------------------------------------------
+
+    with section("Negative Revenue Without Return Flag") as s:
+        st.markdown("""
+        ### Negative Revenue Without Return Flag
+
+        In this check, we look for transactions where revenue is negative,  
+        but they are **not marked as returns**. These cases could indicate:
+        - Data entry errors (e.g. wrong quantity or price)
+        - System glitches
+        - Misclassified transactions
+
+        Only records with negative receipts and not marked as returns are shown below.
+        """)
+
+        # Podezřelé záznamy (vybrané při stavbě agregací, viz data.anomalies)
+        negative_revenue_issues = load_unflagged_negatives()
+
+        # Zobrazení tabulky, pokud něco najdeme
+        if not negative_revenue_issues.empty:
+            st.warning(f"{len(negative_revenue_issues)} suspicious records found with negative revenue and no return flag.")
+            negative_revenue_issues = negative_revenue_issues.assign(Price=price_in_pounds(negative_revenue_issues["Price"]))
+            st.dataframe(negative_revenue_issues[["Date", "CustomerNo", "ProductName", "Quantity", "Price", "Revenue", "ReturnFlag", "Country"]], use_container_width=True)
+        else:
+            st.success("✅ No issues found. All negative revenue transactions are properly marked as returns.")
+
+        s.rows_out = len(negative_revenue_issues)
+
+    st.divider()  # Oddělovač
+    # ------------------------------------------------------------
+
+    with section("Products with High Return Rate") as s:
+        st.markdown("""
+        ### Products with High Return Rate
+
+        This check identifies products with an unusually high return rate.  
+        A high return rate might indicate issues such as:
+        - poor product quality  
+        - misleading descriptions  
+        - mismatched expectations  
+        - or even technical problems
+
+        We calculate the return rate as the percentage of returned units out of total units sold.
+        Only products with **return rate above 30%** are shown.
+        """)
+
+        # Produkty s vysokou vratkovostí - prodané kusy vynechávají záporné quantity
+        # při prodeji (např. ručně odepsané položky), viz data.anomalies
+        high_return_products_table = high_return_products(RETURN_RATE_LIMIT)
+
+        # Výstup: varování nebo tabulka
+        if not high_return_products_table.empty:
+            st.warning(f"{len(high_return_products_table)} product(s) with return rate above 30%.")
+            st.dataframe(high_return_products_table, use_container_width=True)
+
+            # Poznámka pod tabulkou
+            st.markdown("""
+            ⚠️ **Note:** Due to the dataset representing only a partial time period,  
+            some products may appear with a return rate above 100% — this can happen  
+            when returns are recorded but the corresponding sale is outside of the dataset.
+            """)
+
+            # Tlačítko pro stažení (soubor se vytvoří až po kliknutí)
+            download_excel(
+                label="📥 Download Excel",
+                table=high_return_products_table,
+                file_name="high_return_rate_products.xlsx",
+                sheet_name="High Return Rate Products",
+            )
+
+        else:
+            st.success("✅ No products found with return rate above 30%.")
+
+        s.rows_out = len(high_return_products_table)
+
+
+    st.divider()  # Oddělovač
+    # ------------------------------------------------------------
+
+    with section("Customers with Excessive Returns") as s:
+        st.markdown("""
+        ### Customers with Excessive Returns
+
+        In this check, we analyze customers who have returned a high number of orders  
+        compared to their total number of purchases. This might indicate:
+        - frequent dissatisfaction
+        - potential abuse of return policy
+        - or inconsistencies in transaction labeling
+
+        The table below shows customers with a **return rate over 30%**.
+        """)
+
+        # Podíl vrácených objednávek na zákazníka - výběr podezřelých (data.anomalies)
+        high_return_customers_table = high_return_customers(RETURN_RATE_LIMIT)
+
+        # Výstup
+        if not high_return_customers_table.empty:
+            st.warning(f"{len(high_return_customers_table)} customers found with return rate above 30%.")
+            st.dataframe(high_return_customers_table, use_container_width=True)
+        else:
+            st.success("✅ No customers found with excessive return rates.")
+
+        # Volitelná poznámka
+        st.markdown("""
+        ⚠️ **Note:** These customers have a return rate above 30%.  
+        Further analysis may be needed to understand the cause (e.g., product issues, abuse, or data gaps).
+        """)
+
+        # Tlačítko pro stažení (soubor se vytvoří až po kliknutí)
+        download_excel(
+            label="📥 Download Customer Return Data",
+            table=high_return_customers_table,
+            file_name="high_return_rate_customers.xlsx",
+            sheet_name="High Return Rate Customers",
+        )
+
+        s.rows_out = len(high_return_customers_table)
+
+    st.divider()  # Oddělovač
+    # ------------------------------------------------------------
+
+    # OUTLIERS IN ORDER VALUE
+    # ------------------------------------------------------------------------------
+
+    with section("Outliers in Order Value") as s:
+        st.markdown("### Outliers in Order Value")
+        st.markdown("""
+        This section helps identify unusually high or low order values.  
+        Such outliers might indicate errors, fraud, or exceptional customers.
+        """)
+
+        # Výpočet celkové hodnoty objednávky (na základě TransactionNo)
+        order_values = query("order_values")
+
+        # BOX PLOT – pro detekci outlierů (statistiky spočítané na serveru)
+        box_fig = generate_order_value_box(order_values["TotalOrderValue"])
+        st.plotly_chart(box_fig, use_container_width=True)
+
+        with st.expander("ℹ️ What does this chart show?"):
+            st.markdown("""
+            - **Box Plot:** This chart shows the overall spread of total order values.  
+              The dots outside the box are considered **outliers** – unusually high or low values compared to most orders.
+
+            These charts help detect suspiciously large orders or potential errors in the data.
+            """)
+
+        # HISTOGRAM – pro přehled rozložení (s logaritmickou osou Y)
+        hist_fig = generate_order_value_histogram(order_values["TotalOrderValue"])
+        st.plotly_chart(hist_fig, use_container_width=True)
+
+        with st.expander("ℹ️ What does this chart show?"):
+            st.markdown("""
+
+            - **Histogram:** This chart shows how often different order values occur.  
+              The **logarithmic Y-axis** helps highlight even rare or extreme values that would otherwise be hard to see.
+
+            These charts help detect suspiciously large orders or potential errors in the data.
+            """)
+
+        s.rows_out = len(order_values)
+
+    st.divider()  # Oddělovač
+    # ------------------------------------------------------------
+
+    with section("Top 1% Orders by Value") as s:
+        # Hranice pro horní 1 % objednávek a objednávky nad ní (data.anomalies)
+        threshold, top_orders_table = top_orders()
+        formatted_threshold = f"{int(round(threshold)):,}".replace(",", " ") + " £"
+
+        # Formátování čísel do čitelné podoby
+        top_orders_table["TotalOrderValue"] = top_orders_table["TotalOrderValue"].apply(
+            lambda x: f"{int(round(x)):,}".replace(",", " ") + " £"
+        )
+
+        # Popis
+        st.markdown("### Top 1% Orders by Value")
+        st.markdown(
+            f"""
+            These are the top 1% of orders with the highest total value.  
+            They may indicate **bulk purchases**, **corporate buyers**, or **potential anomalies**.
+
+            - Threshold for top 1%: **{formatted_threshold}**
+            """
+        )
+
+        # Zobrazení tabulky
+        st.dataframe(top_orders_table, use_container_width=True)
+
+        # Tlačítko pro stažení (soubor se vytvoří až po kliknutí)
+        download_excel(
+            label="📥 Download Top 1% Orders as Excel",
+            table=top_orders_table,
+            file_name="top_1_percent_orders.xlsx",
+            sheet_name="Top 1 Percent Orders",
+        )
+
+        s.rows_out = len(top_orders_table)
+
+    st.divider()  # Oddělovač
+    # ------------------------------------------------------------
+
+    # FULL ANOMALY REPORT - export na pozadí
+    # ------------------------------------------------------------------------------
+
+    with section("Full Anomaly Report"):
+        st.markdown("### Full Anomaly Report")
+        st.markdown("""
+        A multi-sheet Excel report with all high-return products and customers and **every order**
+        above the chosen value. Large reports are prepared in the background — you can keep
+        browsing and download the file from the sidebar when it is ready.
+        """)
+
+        min_value = st.number_input(
+            "Minimum order value (£)", min_value=0, value=int(round(threshold)), step=100
+        )
+
+        # Řádky datasetu se načtou až ve vlákně fronty (filtr platný při zařazení)
+        store, filters = dataset_store(), current_filters()
+        queue_export(
+            label="📦 Prepare Full Report in Background",
+            name="anomaly_report",
+            build=lambda: {
+                "High Return Products": high_return_products_table,
+                "High Return Customers": high_return_customers_table,
+                "Orders Above Threshold": orders_above(store.rows(filters), min_value),
+            },
+            file_name="anomaly_report.xlsx",
+            params=(min_value,),
+        )
@@ -2,45 +2,21 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-from io import BytesIO
 import plotly.graph_objects as go
 
-# Hlavní nadpis a popis sekce
-st.markdown("""
-    <h1 style="text-align: center;">Sales Transaction Analysis</h1>
-    <h3 style="text-align: center; color: #555;">Best Selling Products</h3>
-    <div padding: 15px; border-radius: 10px; text-align: center;">
-        <p style="font-size: 16px;">
-            This page contains an analysis of the best and worst selling products 
-            in the e-shop. It includes TOP products by number of sales, products 
-            with the lowest sales and products with the highest sales. <br>
-        </p>
-    </div>
-""", unsafe_allow_html=True)
+from data.cube import load_cube, rollup
+from data.export import download_excel
+from data.figures import memoized_figure
+from data.profiling import profiled, section
+from data.queries import query
 
-# Načtení datasetu
-df = pd.read_csv("cleaned_sales_data.csv", parse_dates=["Date"])
-df["Date"] = pd.to_datetime(df["Date"], format="%d/%m/%Y")  # Oprava typu
-
-st.divider()  # Oddělovač
-
-# GRAF TOP SELLING PRODUCTS
-# ------------------------------------------------------------------------------
-
-# Vizuální oddělení výběru top N produktů
-st.markdown("**Select number of top-selling products:**")
-top_n = st.radio("", options=[5, 10, 15, 20], horizontal=True)
 
 # Funkce pro generování grafu
-def generate_top_products_graph(df, top_n):
-    top_n_products = df.groupby('ProductNo')['Quantity'].sum().sort_values(ascending=False).head(top_n)
-
-    top_n_products_df = pd.DataFrame({
-        'Number of sales': top_n_products.values,
-        'ProductNo': top_n_products.index
-    })
-
-    top_n_products_df = top_n_products_df.merge(df[['ProductNo', 'ProductName']].drop_duplicates(), on='ProductNo', how='left')
+@profiled()
+@memoized_figure("top_n")
+def generate_top_products_graph(top_n):
+    # Top N produktů podle prodaných kusů i s názvy (data.queries)
+    top_n_products_df = query("top_products", "Quantity", top_n).rename(columns={'Value': 'Number of sales'})
 
     fig = px.bar(
         top_n_products_df,
@@ -88,35 +64,12 @@ def generate_top_products_graph(df, top_n):
 
     return fig
 
-# Zobrazení grafu
-fig = generate_top_products_graph(df, top_n)
-st.plotly_chart(fig, use_container_width=True)
-st.markdown("<br><br>", unsafe_allow_html=True)  # Mezera po grafu
-
-st.divider()  # Oddělovač
-
-# GRAF HIGHEST REVENUE PRODUCTS
-# ------------------------------------------------------------------------------
 
-# Unikátní klíč pro radio buttony (aby Streamlit věděl, že jde o jiný prvek)
-st.markdown("**Select number of highest revenue products:**")
-top_h = st.radio("", options=[5, 10, 15, 20], horizontal=True, key="top_h_revenue")
-
-# Přidání sloupce Revenue (tržby) do datasetu
-df["Revenue"] = df["Price"] * df["Quantity"]
-
-def generate_top_revenue_products_graph(df, top_n):  # Funkce nyní přijímá DF i top_n
-    # Výběr top N produktů podle tržby
-    top_n_revenue = df.groupby('ProductNo')['Revenue'].sum().sort_values(ascending=False).head(top_n)
-
-    # Vytvoření DataFrame pro vizualizaci
-    top_n_revenue_df = pd.DataFrame({
-        'Amount of revenue': top_n_revenue.values,
-        'ProductNo': top_n_revenue.index
-    })
-
-    # Přidání názvu produktu
-    top_n_revenue_df = top_n_revenue_df.merge(df[['ProductNo', 'ProductName']].drop_duplicates(), on='ProductNo', how='left')
+@profiled()
+@memoized_figure("top_n")
+def generate_top_revenue_products_graph(top_n):
+    # Výběr top N produktů podle tržby i s názvy (data.queries)
+    top_n_revenue_df = query("top_products", "Revenue", top_n).rename(columns={'Value': 'Amount of revenue'})
 
     # Vytvoření grafu pomocí Plotly
     fig = px.bar(
@@ -166,19 +119,11 @@ def generate_top_revenue_products_graph(df, top_n):  # Funkce nyní přijímá D
 
     return fig
 
-# Zobrazení grafu
-fig = generate_top_revenue_products_graph(df, top_h)  # 
-st.plotly_chart(fig, use_container_width=True)
-
-# Oddělovač pro další obsah
-st.divider()
-
-# TABULKA LOWEST SELLING PRODUCTS
-# ------------------------------------------------------------------------------
 
-def show_lowest_sales_table(df, threshold=10):
+@profiled()
+def show_lowest_sales_table(cube, threshold=10):
     # Odstraníme vrácené produkty a spočítáme počet prodaných kusů podle ProductNo
-    lowest_sales = df[df['ReturnFlag'] != True].groupby('ProductNo')['Quantity'].sum()
+    lowest_sales = rollup(cube.products, 'ProductNo', ['Quantity'], ReturnFlag=False)['Quantity']
 
     # Vyfiltrujeme produkty s malým počtem prodejů
     lowest_sales = lowest_sales[lowest_sales <= threshold].sort_values()
@@ -190,7 +135,7 @@ def show_lowest_sales_table(df, threshold=10):
     })
 
     # Přidáme názvy produktů
-    table_df = table_df.merge(df[['ProductNo', 'ProductName']].drop_duplicates(), on='ProductNo', how='left')
+    table_df = table_df.merge(cube.products[['ProductNo', 'ProductName']].drop_duplicates(), on='ProductNo', how='left')
 
     # Přeskládáme sloupce pro čitelnost
     table_df = table_df[['ProductName', 'ProductNo', 'Number of Sales']]
@@ -205,17 +150,69 @@ def show_lowest_sales_table(df, threshold=10):
     # Zobrazíme tabulku ve Streamlit
     st.dataframe(table_df, use_container_width=True)
 
-    # Stažení do Excelu
-    from io import BytesIO
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        table_df.to_excel(writer, index=False, sheet_name='Low Sales')
-
-    st.download_button(
+    # Stažení do Excelu (soubor se vytvoří až po kliknutí).
+    # Klíč cache obsahuje práh - tabulka na něm závisí.
+    download_excel(
         label="📥 Download as Excel",
-        data=output.getvalue(),
+        table=table_df,
         file_name="lowest_selling_products.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        sheet_name="Low Sales",
+        name=f"lowest_selling_products_{threshold}",
     )
 
-show_lowest_sales_table(df)
+
+def render():
+    # Hlavní nadpis a popis sekce
+    st.markdown("""
+        <h1 style="text-align: center;">Sales Transaction Analysis</h1>
+        <h3 style="text-align: center; color: #555;">Best Selling Products</h3>
+        <div padding: 15px; border-radius: 10px; text-align: center;">
+            <p style="font-size: 16px;">
+                This page contains an analysis of the best and worst selling products 
+                in the e-shop. It includes TOP products by number of sales, products 
+                with the lowest sales and products with the highest sales. <br>
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Načtení datasetu
+    with section("Load cube"):
+        cube = load_cube()
+
+    st.divider()  # Oddělovač
+
+    # GRAF TOP SELLING PRODUCTS
+    # ------------------------------------------------------------------------------
+
+    with section("TOP SELLING PRODUCTS GRAPH"):
+        # Vizuální oddělení výběru top N produktů
+        st.markdown("**Select number of top-selling products:**")
+        top_n = st.radio("", options=[5, 10, 15, 20], horizontal=True)
+
+        # Zobrazení grafu
+        fig = generate_top_products_graph(top_n)
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("<br><br>", unsafe_allow_html=True)  # Mezera po grafu
+
+    st.divider()  # Oddělovač
+
+    # GRAF HIGHEST REVENUE PRODUCTS
+    # ------------------------------------------------------------------------------
+
+    with section("HIGHEST REVENUE PRODUCTS GRAPH"):
+        # Unikátní klíč pro radio buttony (aby Streamlit věděl, že jde o jiný prvek)
+        st.markdown("**Select number of highest revenue products:**")
+        top_h = st.radio("", options=[5, 10, 15, 20], horizontal=True, key="top_h_revenue")
+
+        # Zobrazení grafu
+        fig = generate_top_revenue_products_graph(top_h)
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Oddělovač pro další obsah
+    st.divider()
+
+    # TABULKA LOWEST SELLING PRODUCTS
+    # ------------------------------------------------------------------------------
+
+    with section("LOWEST SELLING PRODUCTS TABLE"):
+        show_lowest_sales_table(cube)
@@ -4,23 +4,11 @@ import numpy as np
 import datetime
 import time
 
-# Hlavní nadpis
-st.markdown("""
-    <h1 style="text-align: center;">Sales Transaction Analysis</h1>
-    <h3 style="text-align: center; color: #555;">General Overview</h3>
-    <p style="text-align: center; font-size: 16px; color: #666;">
-        This analysis is based on anonymized transaction data from an e-commerce store.
-        The dataset contains information about orders, customers, and product sales.
-        The goal is to identify key sales trends, best-selling products, and customer behavior.
-    </p>
-""", unsafe_allow_html=True)
-
-# Import datasetu
-df = pd.read_csv("cleaned_sales_data.csv", parse_dates=["Date"])
-df["Date"] = pd.to_datetime(df["Date"], format="%d/%m/%Y")  # Oprava typu
+from data.overview import load_overview
+from data.profiling import section
 
 # CSS pro stylování karet
-card_style = """
+CARD_STYLE = """
     <style>
         .metric-card {
             background-color: #E3F2FD;
@@ -42,64 +30,92 @@ card_style = """
         }
     </style>
 """
-st.markdown(card_style, unsafe_allow_html=True)
 
-# **První řada: Tři metriky vedle sebe**
-col1, col2, col3 = st.columns(3)
 
-with col1:
-    st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-title">📊 Total Unique Transactions</div>
-            <div class="metric-value">{'{:,.0f}'.format(df["TransactionNo"].nunique()).replace(',', ' ')}</div>
-        </div>
-    """, unsafe_allow_html=True)
+# Formát počtu "12 345" - přibližné počty se značkou ≈
+def format_count(value, error=None):
+    text = '{:,.0f}'.format(value).replace(',', ' ')
+    return text if error is None else f"≈ {text}"
 
-with col2:
-    st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-title">📦 Total Unique Products</div>
-            <div class="metric-value">{'{:,.0f}'.format(df["ProductNo"].nunique()).replace(',', ' ')}</div>
-        </div>
-    """, unsafe_allow_html=True)
 
-with col3:
-    st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-title">👥 Total Unique Customers</div>
-            <div class="metric-value">{'{:,.0f}'.format(df["CustomerNo"].nunique()).replace(',', ' ')}</div>
-        </div>
+def render():
+    # Hlavní nadpis
+    st.markdown("""
+        <h1 style="text-align: center;">Sales Transaction Analysis</h1>
+        <h3 style="text-align: center; color: #555;">General Overview</h3>
+        <p style="text-align: center; font-size: 16px; color: #666;">
+            This analysis is based on anonymized transaction data from an e-commerce store.
+            The dataset contains information about orders, customers, and product sales.
+            The goal is to identify key sales trends, best-selling products, and customer behavior.
+        </p>
     """, unsafe_allow_html=True)
 
-# **Přidání mezery mezi řadami**
-st.markdown("<br>", unsafe_allow_html=True)  # Přidání mezery
+    # Souhrnné KPI (při velkém datasetu spočítané po částech, bez načtení do paměti)
+    with section("Load overview"):
+        kpis = load_overview()
 
-# **Druhá řada: Dvě metriky vedle sebe**
-col4, col5 = st.columns(2)
+    with section("KPI cards"):
+        st.markdown(CARD_STYLE, unsafe_allow_html=True)
 
-with col4:
-    st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-title">📜 Total Number of Transactions</div>
-            <div class="metric-value">{'{:,.0f}'.format(df["TransactionNo"].count()).replace(',', ' ')}</div>
-        </div>
-    """, unsafe_allow_html=True)
+        # **První řada: Tři metriky vedle sebe**
+        col1, col2, col3 = st.columns(3)
 
-with col5:
-    st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-title">💲 Total Sales</div>
-            <div class="metric-value">${'{:,.2f}'.format((df["Price"] * df["Quantity"]).sum()).replace(',', ' ')}</div>
-        </div>
-    """, unsafe_allow_html=True)
+        with col1:
+            st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-title">📊 Total Unique Transactions</div>
+                    <div class="metric-value">{format_count(kpis["unique_transactions"], kpis["distinct_error"])}</div>
+                </div>
+            """, unsafe_allow_html=True)
+
+        with col2:
+            st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-title">📦 Total Unique Products</div>
+                    <div class="metric-value">{format_count(kpis["unique_products"], kpis["distinct_error"])}</div>
+                </div>
+            """, unsafe_allow_html=True)
+
+        with col3:
+            st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-title">👥 Total Unique Customers</div>
+                    <div class="metric-value">{format_count(kpis["unique_customers"], kpis["distinct_error"])}</div>
+                </div>
+            """, unsafe_allow_html=True)
+
+        if kpis["distinct_error"] is not None:
+            st.caption(f"Unique counts are approximate (HyperLogLog), standard error ±{kpis['distinct_error']:.2%}.")
+
+        # **Přidání mezery mezi řadami**
+        st.markdown("<br>", unsafe_allow_html=True)  # Přidání mezery
+
+        # **Druhá řada: Dvě metriky vedle sebe**
+        col4, col5 = st.columns(2)
+
+        with col4:
+            st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-title">📜 Total Number of Transactions</div>
+                    <div class="metric-value">{'{:,.0f}'.format(kpis["lines"]).replace(',', ' ')}</div>
+                </div>
+            """, unsafe_allow_html=True)
+
+        with col5:
+            st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-title">💲 Total Sales</div>
+                    <div class="metric-value">${'{:,.2f}'.format(kpis["total_sales"]).replace(',', ' ')}</div>
+                </div>
+            """, unsafe_allow_html=True)
 
-# **Přidání mezery mezi řadami**
-st.markdown("<br>", unsafe_allow_html=True)  # Přidání mezery
+        # **Přidání mezery mezi řadami**
+        st.markdown("<br>", unsafe_allow_html=True)  # Přidání mezery
 
-# **Třetí řada: Časový rozsah**
-st.markdown(f"""
-    <div class="metric-card" style="background-color: #E3F2FD; max-width: 400px; margin: auto;">
-        <div class="metric-title">🕒 Time Range of Data</div>
-        <div class="metric-value">{df['Date'].min().strftime('%d.%m.%Y')} - {df['Date'].max().strftime('%d.%m.%Y')}</div>
-    </div>
-""", unsafe_allow_html=True)
+        # **Třetí řada: Časový rozsah**
+        st.markdown(f"""
+            <div class="metric-card" style="background-color: #E3F2FD; max-width: 400px; margin: auto;">
+                <div class="metric-title">🕒 Time Range of Data</div>
+                <div class="metric-value">{kpis['first_date'].strftime('%d.%m.%Y')} - {kpis['last_date'].strftime('%d.%m.%Y')}</div>
+            </div>
+        """, unsafe_allow_html=True)
@@ -2,62 +2,28 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-from io import BytesIO
 import plotly.graph_objects as go
 
+from data.cube import load_cube, rollup
+from data.export import download_excel
+from data.figures import memoized_figure
+from data.profiling import page_fragment, profiled, section
+from data.queries import query
+from data.timeline import load_daily, month_days
 
-# Hlavní nadpis a popis sekce
-st.markdown("""
-    <h1 style="text-align: center;">Sales Transaction Analysis</h1>
-    <h3 style="text-align: center; color: #555;">Sales Trends Over Time</h3>
-    <div padding: 15px; border-radius: 10px; text-align: center;">
-        <p style="font-size: 16px;">
-            This page contains an analysis of sales trends over time. 
-            It includes wholesale sales by month with/ without returns, 
-            daily trends and monthly sales reports.
-        </p>
-    </div>
-""", unsafe_allow_html=True)
-
-# Načtení datasetu
-df = pd.read_csv("cleaned_sales_data.csv", parse_dates=["Date"])
-df["Date"] = pd.to_datetime(df["Date"], format="%d/%m/%Y")  # Oprava typu
-df["Revenue"] = df["Quantity"] * df["Price"]
-
-st.divider()  # Oddělovač
 
 # MONTHLY REVENUE GRAPH
 # ------------------------------------------------------------------------------
 
-# Vizuální oddělení výběru měsíce
-st.markdown("**Select number of months to display:**")
-selected_months = st.selectbox(
-    "",
-    options=["all", 1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
-    format_func=lambda x: "All" if x == "all" else f"{x} month(s)",
-    index=0
-)
-
-# Vizuální oddělení výběru vratek
-st.markdown("**Include returns in the graph:**")
-returns_filter = st.selectbox(
-    "",
-    options=["include", "exclude"],
-    format_func=lambda x: "Include returns" if x == "include" else "Exclude returns",
-    index=0
-)
-
 # Funkce pro generování grafu měsíčních tržeb
-def generate_monthly_revenue_graph(selected_months="all", returns_filter="include"):
-    # KOPIE DATASETU
-    df_filtered = df.copy()
-
-    # FILTRACE VRATEK
-    if returns_filter == "exclude":
-        df_filtered = df_filtered[df_filtered["Quantity"] > 0]  # Odstraní vratky (Quantity < 0)
+@profiled()
+@memoized_figure("selected_months", "returns_filter")
+def generate_monthly_revenue_graph(cube, selected_months="all", returns_filter="include"):
+    # FILTRACE VRATEK - bez vratek se sčítají jen řádky s Quantity > 0
+    measure = "PositiveRevenue" if returns_filter == "exclude" else "Revenue"
 
     # SESKUPENÍ PODLE MĚSÍCŮ
-    monthly_revenue = df_filtered.groupby(df_filtered['Date'].dt.to_period('M'))['Revenue'].sum()
+    monthly_revenue = rollup(cube.products, "Month", [measure])[measure]
 
     # PŘEVOD DATA NA FORMÁT "Mar 2019"
     formatted_months = monthly_revenue.index.to_timestamp().strftime("%b %Y")
@@ -97,41 +63,17 @@ def generate_monthly_revenue_graph(selected_months="all", returns_filter="includ
 
     return fig
 
-# VYTVOŘENÍ GRAFU
-monthly_revenue_graph = generate_monthly_revenue_graph(selected_months, returns_filter)
-
-# ZOBRAZENÍ GRAFU
-st.plotly_chart(
-    monthly_revenue_graph,
-    use_container_width=True,
-    config={"displayModeBar": False}
-)
-
-st.divider()  # Oddělovač
 
 # DAILY REVENUE GRAF (0,9 percentil)
 # ------------------------------------------------------------------------------
 
-# Přidáme nový sloupec pro rok a měsíc
-df["YearMonth"] = df["Date"].dt.to_period("M")
+# Funkce pro generování grafu denních tržeb vybraného měsíce
+@profiled()
+def generate_daily_revenue_graph(daily, selected_month):
 
-# Vytvoření seznamu unikátních měsíců (např. '2024-03', '2024-04')
-month_options = sorted(df["YearMonth"].astype(str).unique())
-
-# Selectbox pro výběr měsíce
-selected_month = st.selectbox("Select month to display:", options=month_options)
-
-# Filtrování dat podle výběru
-df_filtered = df[df["YearMonth"].astype(str) == selected_month]
-
-# Funkce pro generování grafu denních tržeb
-def generate_daily_revenue_graph(data = None): # Přidání argumentu 'data'
-    
-    # Pokud není zadán DataFrame, použij globální 'df'
-    if data is None:
-        data = df_filtered
-
-    daily_revenue = data[data['ReturnFlag'] != True].groupby('Date')['Revenue'].sum()
+    # Dny vybraného měsíce - řez předpočítané denní řady (bez vratek)
+    month = month_days(daily, selected_month)
+    daily_revenue = month["Revenue"]
 
     # Výpočet 90. percentilu
     threshold = daily_revenue.quantile(0.90)
@@ -144,7 +86,7 @@ def generate_daily_revenue_graph(data = None): # Přidání argumentu 'data'
     bottom_days = daily_revenue.nsmallest(1).index
 
     # Počet objednávek na den bez započtení vratek
-    daily_orders = df[df['ReturnFlag'] != True].groupby('Date')['TransactionNo'].nunique()
+    daily_orders = month["Orders"]
 
     # Určení barev
     colors = ['#4682B4' if date not in top_days and date not in bottom_days
@@ -208,68 +150,122 @@ def generate_daily_revenue_graph(data = None): # Přidání argumentu 'data'
 )
 
     return fig
-# VYTVOŘENÍ GRAFU
-daily_revenue_graph = generate_daily_revenue_graph(df_filtered)
-
-# ZOBRAZENÍ GRAFU
-st.plotly_chart(
-    daily_revenue_graph,
-    use_container_width=True,
-    config={"displayModeBar": False}
-)
 
-st.divider()  # Oddělovač
 
 # MONTHLY REVENUE TABLE - Přehled měsíčních tržeb
 # ------------------------------------------------------------------------------
 
+# Měsíční tržby, objednávky, AOV a vratky (data.queries - pandas nebo SQL backend)
+@profiled()
 def generate_monthly_revenue_table():
-    monthly_data = df[df['ReturnFlag'] != True].groupby(df['Date'].dt.to_period('M')).agg(
-        Total_Revenue=('Revenue', 'sum'),
-        Orders_Count=('TransactionNo', 'nunique')
-    )
+    return query("monthly_revenue")
+
+
+# SEKCE S VLASTNÍMI WIDGETY - fragmenty, změna výběru překreslí jen danou sekci
+# ------------------------------------------------------------------------------
 
-    # Přidání sloupce pro průměrnou hodnotu objednávky
-    monthly_data['Average_Order_Value'] = (monthly_data['Total_Revenue'] / monthly_data['Orders_Count']).round(2)
+@page_fragment
+def monthly_revenue_graph_section(cube):
+    with section("MONTHLY REVENUE GRAPH"):
+        # Vizuální oddělení výběru měsíce
+        st.markdown("**Select number of months to display:**")
+        selected_months = st.selectbox(
+            "",
+            options=["all", 1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+            format_func=lambda x: "All" if x == "all" else f"{x} month(s)",
+            index=0
+        )
 
-    # Přidání sloupce pro celkový počet objednávek
-    monthly_returns = df[df['ReturnFlag'] == True].groupby(df['Date'].dt.to_period('M'))['ReturnFlag'].count()
-    monthly_data = monthly_data.merge(monthly_returns, left_index=True, right_index=True, how='left') \
-                               .rename(columns={'ReturnFlag': 'Return_Count'})
-    monthly_data['Return_Count'] = monthly_data['Return_Count'].fillna(0).astype(int)
+        # Vizuální oddělení výběru vratek
+        st.markdown("**Include returns in the graph:**")
+        returns_filter = st.selectbox(
+            "",
+            options=["include", "exclude"],
+            format_func=lambda x: "Include returns" if x == "include" else "Exclude returns",
+            index=0
+        )
 
-    # Přidání sloupce pro celkovou hodnotu vratek
-    returned_revenue_by_month = df[df['ReturnFlag'] == True].groupby(df['Date'].dt.to_period('M'))['Revenue'].sum()
-    monthly_data = monthly_data.merge(returned_revenue_by_month, left_index=True, right_index=True, how='left') \
-                               .rename(columns={'Revenue': 'Returned_Revenue'})
-    monthly_data['Returned_Revenue'] = monthly_data['Returned_Revenue'].fillna(0)
-    monthly_data['Net_Revenue'] = monthly_data['Total_Revenue'] - monthly_data['Returned_Revenue']
+        # VYTVOŘENÍ GRAFU
+        monthly_revenue_graph = generate_monthly_revenue_graph(cube, selected_months, returns_filter)
 
-    # Přidání sloupce pro procento vratek
-    monthly_data = monthly_data.reset_index()
-    monthly_data['Date'] = monthly_data['Date'].astype(str)
+        # ZOBRAZENÍ GRAFU
+        st.plotly_chart(
+            monthly_revenue_graph,
+            use_container_width=True,
+            config={"displayModeBar": False}
+        )
 
-    return monthly_data
 
-# VYTVOŘENÍ TABULKY
-monthly_revenue_table = generate_monthly_revenue_table()
+@page_fragment
+def daily_revenue_graph_section(daily):
+    with section("DAILY REVENUE GRAPH"):
+        # Seznam měsíců z indexu denní řady (např. '2024-03', '2024-04')
+        month_options = [str(month) for month in daily.months]
 
-st.subheader("📊 Monthly Revenue Overview")
-st.dataframe(monthly_revenue_table, use_container_width=True)
+        # Selectbox pro výběr měsíce
+        selected_month = st.selectbox("Select month to display:", options=month_options)
 
-# Vytvoření tlačítka pro stažení tabulky jako XLSX
-def to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Monthly Revenue Overview')
-    return output.getvalue()
+        # VYTVOŘENÍ GRAFU
+        daily_revenue_graph = generate_daily_revenue_graph(daily, selected_month)
 
-excel_data = to_excel(monthly_revenue_table)
+        # ZOBRAZENÍ GRAFU
+        st.plotly_chart(
+            daily_revenue_graph,
+            use_container_width=True,
+            config={"displayModeBar": False}
+        )
 
-st.download_button(
-    label="📥 Download Monthly Revenue Overview as XLSX",
-    data=excel_data,
-    file_name="monthly_revenue_overview.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-)
-# END OF PAGE
\ No newline at end of file
+
+def render():
+    # Hlavní nadpis a popis sekce
+    st.markdown("""
+        <h1 style="text-align: center;">Sales Transaction Analysis</h1>
+        <h3 style="text-align: center; color: #555;">Sales Trends Over Time</h3>
+        <div padding: 15px; border-radius: 10px; text-align: center;">
+            <p style="font-size: 16px;">
+                This page contains an analysis of sales trends over time.
+                It includes wholesale sales by month with/ without returns,
+                daily trends and monthly sales reports.
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Načtení předagregované kostky
+    with section("Load cube"):
+        cube = load_cube()
+        daily = load_daily()
+
+    st.divider()  # Oddělovač
+
+    # MONTHLY REVENUE GRAPH
+    # --------------------------------------------------------------------------
+
+    monthly_revenue_graph_section(cube)
+
+    st.divider()  # Oddělovač
+
+    # DAILY REVENUE GRAF (0,9 percentil)
+    # --------------------------------------------------------------------------
+
+    daily_revenue_graph_section(daily)
+
+    st.divider()  # Oddělovač
+
+    # MONTHLY REVENUE TABLE - Přehled měsíčních tržeb
+    # --------------------------------------------------------------------------
+
+    with section("MONTHLY REVENUE TABLE"):
+        # VYTVOŘENÍ TABULKY
+        monthly_revenue_table = generate_monthly_revenue_table()
+
+        st.subheader("📊 Monthly Revenue Overview")
+        st.dataframe(monthly_revenue_table, use_container_width=True)
+
+        # Tlačítko pro stažení (soubor se vytvoří až po kliknutí)
+        download_excel(
+            label="📥 Download Monthly Revenue Overview as XLSX",
+            table=monthly_revenue_table,
+            file_name="monthly_revenue_overview.xlsx",
+            sheet_name="Monthly Revenue Overview",
+        )
+# END OF PAGE
@@ -0,0 +1,22 @@
+from data.pages import (
+    Anomalies,
+    Best_Selling_Products,
+    Customer_Insights,
+    General_Overview,
+    Geographic_Analysis,
+    Returned_Products,
+    Sales_Trends,
+)
+
+# Registr stránek - název v navigaci -> modul s funkcí render().
+# Moduly se importují jednou za proces, takže se zdrojový kód nečte
+# a nepřekládá při každém rerunu a funkce stránek mají stálou identitu.
+PAGES = {
+    "General Overview": General_Overview,
+    "Best-Selling Products": Best_Selling_Products,
+    "Sales Trends Over Time": Sales_Trends,
+    "Returned Products & Refunds": Returned_Products,
+    "Customer Insights": Customer_Insights,
+    "Geographic Analysis": Geographic_Analysis,
+    "Anomalies & Issues Detection": Anomalies,
+}
@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# PŘEDPOČET AGREGACÍ A TABULEK STRÁNEK (mimo streamlit run)
+# ------------------------------------------------------------------------------
+#
+# Spočítá všechny předagregace (kostka, denní řada, zákazníci, KPI, ...)
+# a tabulky stránek z data.queries pro nefiltrovaný pohled a uloží je do
+# úložiště výsledků (data.artifacts) pro aktuální verzi dat. Aplikace je pak
+# jen načte - při prvním zobrazení stránky se nic nepočítá. Spouští se po
+# každém nočním exportu; grafy se z hotových tabulek skládají až ve stránce
+# (závisí na volbách ve widgetech).
+#
+# Dataset se načte jednou v hlavním procesu a výpočty běží paralelně v poolu
+# procesů (na Linuxu fork - procesy sdílí načtenou tabulku, jinak si ji každý
+# načte z binární kopie). Nejdřív se počítají předagregace a zveřejní se,
+# pak tabulky stránek, které z nich vychází (kostka, dimenze zákazníků).
+#
+# Spuštění: python -m data.precompute [cesta_k_csv] [--workers N] [--force]
+
+# Tabulky, které stránky zobrazují bez filtru (název, argumenty, parametry) -
+# top N pro každou volbu na stránce Best-Selling Products
+PAGE_QUERIES = [
+    ("monthly_revenue", (), {}),
+    ("aov_by_country", (), {}),
+    *(("top_products", (measure, n), {}) for measure in ("Quantity", "Revenue") for n in (5, 10, 15, 20)),
+    ("return_rates", ("ProductName",), {}),
+    ("return_rates", ("Country",), {"basis": "sign"}),
+    ("return_rates", ("CustomerNo",), {"orders": True}),
+    ("return_rates", ("Month",), {}),
+    ("order_values", (), {}),
+    ("segment_summary", (), {}),
+]
+
+
+def _quiet():
+    import streamlit.logger
+
+    streamlit.logger.set_log_level("error")  # Varování o chybějícím kontextu Streamlitu
+
+
+def _aggregate_task(path, directory, name):
+    from data.artifacts import write_artifact
+    from data.loader import dataset_store
+
+    _quiet()
+    start = time.perf_counter()
+    value = dataset_store(path).aggregate(name)
+    key = f"aggregate-{name}"
+    return key, time.perf_counter() - start, write_artifact(directory, key, value)
+
+
+def _query_task(path, directory, name, args, kwargs):
+    from data.artifacts import write_artifact
+    from data.queries import query, query_key
+
+    _quiet()
+    start = time.perf_counter()
+    value = query(name, *args, path=path, precomputed=False, **kwargs)
+    key = query_key(name, *args, **kwargs)
+    return key, time.perf_counter() - start, write_artifact(directory, key, value)
+
+
+def _run(executor, tasks, entries):
+    futures = [executor.submit(*task) for task in tasks]
+    for future in as_completed(futures):
+        key, seconds, size = future.result()
+        entries[key] = {"seconds": round(seconds, 4), "bytes": size}
+        print(f"  {key:<45} {seconds:8.2f} s {size / 1024:10,.0f} KB", file=sys.stderr)
+
+
+def precompute(path, workers=None, force=False):
+    _quiet()
+
+    import data.pages  # noqa: F401 - registrace všech předagregací
+    from data.artifacts import MANIFEST, artifact_dir, prune, publish
+    from data.loader import AGGREGATES, artifact_version, dataset_store
+    from data.queries import query_key
+    from data.streaming import streaming_enabled
+
+    directory = artifact_dir(path, artifact_version(path))
+    keys = [f"aggregate-{name}" for name in AGGREGATES] + [query_key(n, *a, **k) for n, a, k in PAGE_QUERIES]
+    if os.path.exists(os.path.join(directory, MANIFEST)) and not force:
+        print(f"{directory} is up to date", file=sys.stderr)
+        return directory
+    shutil.rmtree(directory, ignore_errors=True)
+
+    start = time.perf_counter()
+    if not streaming_enabled(path):
+        dataset_store(path).refresh()  # Jedno načtení (a binární kopie) pro všechny procesy
+
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context) as executor:
+        _run(executor, [(_aggregate_task, path, directory, name) for name in AGGREGATES], entries)
+        publish(directory, entries, path)  # Tabulky stránek už čtou hotové předagregace
+        _run(executor, [(_query_task, path, directory, *q) for q in PAGE_QUERIES], entries)
+
+    publish(directory, {key: entries[key] for key in keys}, path)
+    prune(directory)
+    print(f"{len(entries)} artifacts in {time.perf_counter() - start:.1f} s -> {directory}", file=sys.stderr)
+    return directory
+
+
+def _option(args, name, default):
+    return args[args.index(name) + 1] if name in args else default
+
+
+if __name__ == "__main__":
+    from data.settings import DATA_PATH
+
+    args = sys.argv[1:]
+    workers = _option(args, "--workers", None)
+    paths = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] != "--workers")]
+
+    precompute(
+        os.path.abspath(paths[0] if paths else DATA_PATH),
+        workers=int(workers) if workers else None,
+        force="--force" in args,
+    )
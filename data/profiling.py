@@ -0,0 +1,213 @@
+import contextlib
+import functools
+import json
+import time
+import tracemalloc
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from data.settings import PROFILE_MEMORY, PROFILING
+
+# PROFILOVÁNÍ SEKCÍ STRÁNEK
+# ------------------------------------------------------------------------------
+#
+# Každá logická sekce stránky se obalí `with section("MONTHLY REVENUE GRAPH"):`
+# (nebo pomocná funkce dekorátorem @profiled()). Pro každý rerun se zaznamená
+# čas, počet řádků na vstupu / výstupu a volitelně změna alokované paměti.
+# Sekce se mohou vnořovat - stránka sama je sekce nejvyšší úrovně.
+#
+# Záznamy se drží v session_state relace, takže se měří jen tam, kde je
+# profilování zapnuté. Bez zapnutého profilování je section() jen prázdný obal.
+
+
+class SectionRecord:
+    __slots__ = ("name", "depth", "start", "seconds", "rows_in", "rows_out", "memory_delta")
+
+    def __init__(self, name, depth=0, start=0.0, rows_in=None):
+        self.name = name
+        self.depth = depth
+        self.start = start
+        self.seconds = None
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.memory_delta = None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ProfileRun:
+    def __init__(self, page, memory=False):
+        self.page = page
+        self.memory = memory
+        self.started = time.perf_counter()
+        self.sections = []
+        self.depth = 0
+        self.exports = []  # Exporty do Excelu nabídnuté stránkou (název, tabulka, list)
+
+    def to_dict(self):
+        return {
+            "page": self.page,
+            "memory": self.memory,
+            "sections": [record.to_dict() for record in self.sections],
+        }
+
+
+def enabled():
+    return st.session_state.get("profiling", PROFILING)
+
+
+# Začátek rerunu - předchozí záznamy relace se zahodí
+def start_run(page):
+    if not enabled():
+        st.session_state.pop("_profile_run", None)
+        return None
+
+    memory = st.session_state.get("profiling_memory", PROFILE_MEMORY)
+    # tracemalloc je globální pro celý proces - zapne se, jakmile ho chce
+    # kterákoli relace, a zůstane zapnutý
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    run = ProfileRun(page, memory=memory)
+    st.session_state["_profile_run"] = run
+    return run
+
+
+def current_run():
+    return st.session_state.get("_profile_run")
+
+
+def _rows(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    products = getattr(value, "products", None)  # SalesCube
+    return len(products) if isinstance(products, pd.DataFrame) else None
+
+
+@contextlib.contextmanager
+def section(name, rows_in=None):
+    run = current_run()
+    if run is None:
+        yield SectionRecord(name, rows_in=rows_in)  # Záznam, který se nikam neukládá
+        return
+
+    start = time.perf_counter()
+    record = SectionRecord(name, run.depth, start - run.started, rows_in)
+    run.sections.append(record)
+    run.depth += 1
+    memory = run.memory and tracemalloc.is_tracing()
+    allocated = tracemalloc.get_traced_memory()[0] if memory else None
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        if memory:
+            record.memory_delta = tracemalloc.get_traced_memory()[0] - allocated
+        run.depth -= 1
+
+
+# Dekorátor - vstupní řádky z prvního argumentu, výstupní z návratové hodnoty
+def profiled(name=None):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with section(name or fn.__name__, rows_in=_rows(args[0]) if args else None) as record:
+                result = fn(*args, **kwargs)
+                record.rows_out = _rows(result)
+                return result
+        return wrapper
+    return decorate
+
+
+# Sekce stránky s vlastními widgety jako st.fragment - změna widgetu spustí
+# znovu jen tuto funkci, ne celou stránku. Data dostává sekce argumenty
+# (při částečném rerunu se volá se stejnými argumenty jako při posledním
+# celém). Částečný rerun (běh skriptu omezený na fragmenty) začne nový
+# záznam profilu, aby se sekce nepřidávaly do záznamu předchozího rerunu;
+# při celém rerunu se sekce zapisují do záznamu stránky. Panel profilu
+# ukazuje vždy poslední celý rerun.
+def _fragment_rerun():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx is not None and bool(ctx.fragment_ids_this_run)
+
+
+def page_fragment(fn):
+    @functools.wraps(fn)
+    def body(*args, **kwargs):
+        run = current_run()
+        if run is not None and _fragment_rerun():
+            start_run(run.page)
+        return fn(*args, **kwargs)
+
+    fragment = st.fragment(body)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # Bez kontextu Streamlitu (bare režim, data.benchmark) st.fragment
+        # funkci vůbec nespustí - sekce se pak vykreslí přímo
+        if get_script_run_ctx(suppress_warning=True) is None:
+            return fn(*args, **kwargs)
+        return fragment(*args, **kwargs)
+    return wrapper
+
+
+# Flame-style graf: osa X je čas od začátku rerunu, řádky jsou úrovně vnoření
+def flame_figure(run):
+    sections = [record for record in run.sections if record.seconds is not None]
+    fig = go.Figure(go.Bar(
+        base=[record.start * 1000 for record in sections],
+        x=[record.seconds * 1000 for record in sections],
+        y=[record.depth for record in sections],
+        orientation="h",
+        text=[record.name for record in sections],
+        textposition="inside",
+        insidetextanchor="start",
+        hovertext=[
+            f"{record.name}<br>{record.seconds * 1000:,.1f} ms"
+            f"<br>rows in: {record.rows_in if record.rows_in is not None else '-'}"
+            f" / out: {record.rows_out if record.rows_out is not None else '-'}"
+            for record in sections
+        ],
+        hoverinfo="text",
+        marker_color=[record.depth for record in sections],
+        marker_colorscale="Oranges",
+    ))
+    fig.update_layout(
+        height=120 + 40 * (max((r.depth for r in sections), default=0) + 1),
+        margin=dict(l=0, r=0, t=10, b=0),
+        xaxis_title="ms",
+        yaxis=dict(autorange="reversed", showticklabels=False),
+        template="plotly_white",
+    )
+    return fig
+
+
+def sections_table(run):
+    table = pd.DataFrame([record.to_dict() for record in run.sections])
+    table["section"] = ["  " * depth + name for depth, name in zip(table["depth"], table["name"])]
+    table["ms"] = (table["seconds"] * 1000).round(1)
+    columns = ["section", "ms", "rows_in", "rows_out"]
+    if run.memory:
+        table["memory_kb"] = (table["memory_delta"] / 1024).round(1)
+        columns.append("memory_kb")
+    return table[columns]
+
+
+# Panel v postranním panelu - volá se po vykreslení stránky
+def render_panel():
+    run = current_run()
+    if run is None or not run.sections:
+        return
+
+    with st.sidebar.expander("⏱️ Profil stránky", expanded=True):
+        st.plotly_chart(flame_figure(run), use_container_width=True, config={"displayModeBar": False})
+        st.dataframe(sections_table(run), use_container_width=True, hide_index=True)
+        st.download_button(
+            label="📥 Stáhnout časy (JSON)",
+            data=json.dumps(run.to_dict(), indent=2),
+            file_name="profile.json",
+            mime="application/json",
+        )
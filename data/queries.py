@@ -0,0 +1,239 @@
+import inspect
+import sys
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.artifacts import load_artifact
+from data.cube import load_cube, rollup
+from data.customers import load_customers
+from data.filters import current_filters
+from data.loader import artifact_version, load_data
+from data.returns import return_metrics
+from data.settings import DATA_PATH, QUERY_BACKEND
+
+# AGREGACE STRÁNEK PŘES VOLITELNÝ BACKEND
+# ------------------------------------------------------------------------------
+#
+# Tabulky, které stránky počítají nad celým datasetem, jdou přes query(název):
+#
+#   monthly_revenue  - měsíční tržby, objednávky, AOV a vratky (Sales Trends)
+#   aov_by_country   - průměrná hodnota objednávky podle země (Geographic)
+#   top_products     - top N produktů podle kusů / tržeb (Best-Selling)
+#   return_rates     - prodané a vrácené kusy podle klíče (Geographic, Anomalies)
+#   order_values     - hodnota každé objednávky (Anomalies, top 1 %)
+#   segment_summary  - zákazníci, objednávky a tržby podle segmentu (Customer Insights)
+#
+# Výchozí backend "pandas" počítá z kostky, dimenze zákazníků a datasetu
+# v paměti. Další backendy (SALES_QUERY_BACKEND):
+#   "duckdb" / "sqlite" - stejný dotaz jako SQL ve vestavěném enginu (data.sql)
+#   "polars"            - líný plán Polars nad binární kopií nebo CSV (data.lazy)
+# Výsledné tabulky mají ve všech případech stejné sloupce a hodnoty - ověřuje
+# python -m data.queries.
+#
+# Pro nefiltrovaný pohled se nejdřív použije tabulka předpočítaná přes
+# python -m data.precompute (data.artifacts), pokud existuje pro aktuální data.
+
+BACKENDS = ("pandas", "duckdb", "sqlite", "polars")
+
+
+def monthly_revenue(path=DATA_PATH):
+    cube = load_cube(path)
+    monthly_data = rollup(cube.products, "Month", ["Revenue"], ReturnFlag=False) \
+                       .rename(columns={'Revenue': 'Total_Revenue'})
+    monthly_data['Orders_Count'] = rollup(cube.orders, "Month", ["Transactions"], ReturnFlag=False)["Transactions"]
+
+    # Přidání sloupce pro průměrnou hodnotu objednávky
+    monthly_data['Average_Order_Value'] = (monthly_data['Total_Revenue'] / monthly_data['Orders_Count']).round(2)
+
+    # Přidání sloupců pro počet a celkovou hodnotu vratek
+    monthly_returns = rollup(cube.products, "Month", ["Lines", "Revenue"], ReturnFlag=True) \
+                          .rename(columns={'Lines': 'Return_Count', 'Revenue': 'Returned_Revenue'})
+    monthly_data = monthly_data.merge(monthly_returns, left_index=True, right_index=True, how='left')
+    monthly_data['Return_Count'] = monthly_data['Return_Count'].fillna(0).astype(int)
+    monthly_data['Returned_Revenue'] = monthly_data['Returned_Revenue'].fillna(0)
+    monthly_data['Net_Revenue'] = monthly_data['Total_Revenue'] - monthly_data['Returned_Revenue']
+
+    monthly_data = monthly_data.reset_index().rename(columns={'Month': 'Date'})
+    monthly_data['Date'] = monthly_data['Date'].astype(str)
+    return monthly_data
+
+
+def aov_by_country(path=DATA_PATH):
+    cube = load_cube(path)
+    aov = rollup(cube.products, "Country", ["Revenue"], ReturnFlag=False)
+    aov["Orders"] = rollup(cube.orders, "Country", ["Transactions"], ReturnFlag=False)["Transactions"]
+    aov = aov.reset_index()
+    aov["AOV"] = aov["Revenue"] / aov["Orders"]
+    return aov.sort_values(by="AOV", ascending=False).reset_index(drop=True)
+
+
+# Top N produktů podle measure ("Quantity" / "Revenue") - sloupce ProductNo,
+# ProductName, Value (produkt s více názvy má více řádků)
+def top_products(measure, n, path=DATA_PATH):
+    cube = load_cube(path)
+    top = rollup(cube.products, "ProductNo", [measure])[measure].sort_values(ascending=False).head(n)
+    top = pd.DataFrame({"ProductNo": top.index, "Value": top.values})
+    names = cube.products[["ProductNo", "ProductName"]].drop_duplicates()
+    return top.merge(names, on="ProductNo", how="left")[["ProductNo", "ProductName", "Value"]]
+
+
+# Metriky vratek (data.returns) jako tabulka; by="Month" = měsíc transakce
+def return_rates(by, basis="flag", orders=False, path=DATA_PATH):
+    df = load_data(path)
+    key = "YearMonth" if by == "Month" else by
+    rates = return_metrics(df, key, basis=basis, orders=orders).reset_index().rename(columns={key: by})
+    if by == "Month":
+        rates["Month"] = rates["Month"].astype(str)
+    return rates
+
+
+def order_values(path=DATA_PATH):
+    df = load_data(path)
+    values = df.groupby("TransactionNo", observed=True)["Revenue"].sum().reset_index()
+    values.columns = ["TransactionNo", "TotalOrderValue"]
+    return values
+
+
+def segment_summary(path=DATA_PATH):
+    summary = load_customers(path).groupby("Segment", observed=False).agg(
+        Customers=("Orders", "size"),
+        Orders=("Orders", "sum"),
+        Total_Revenue=("Revenue", "sum"),
+    )
+    return summary.reset_index()
+
+
+QUERIES = {
+    "monthly_revenue": monthly_revenue,
+    "aov_by_country": aov_by_country,
+    "top_products": top_products,
+    "return_rates": return_rates,
+    "order_values": order_values,
+    "segment_summary": segment_summary,
+}
+
+
+# Klíč předpočítané tabulky - název a hodnoty všech parametrů (i výchozích),
+# takže query("x", "a", basis="b") a query("x", "a", "b") mají stejný klíč
+def query_key(name, *args, **kwargs):
+    bound = inspect.signature(QUERIES[name]).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return "-".join(["query", name, *(str(value) for key, value in bound.arguments.items() if key != "path")])
+
+
+# precomputed=False vynutí výpočet (kontrola shody, samotný předpočet)
+def query(name, *args, backend=None, path=DATA_PATH, precomputed=True, **kwargs):
+    if precomputed and current_filters() is None:
+        value = load_artifact(path, artifact_version(path), query_key(name, *args, **kwargs))
+        if value is not None:
+            return value
+
+    backend = backend or QUERY_BACKEND
+    if backend == "pandas":
+        return QUERIES[name](*args, path=path, **kwargs)
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown query backend: {backend!r}")
+
+    with st.spinner("Running query..."):
+        # Import jen při použití daného backendu
+        if backend == "polars":
+            from data.lazy import polars_backend
+            engine = polars_backend(path)
+        else:
+            from data.sql import sql_backend
+            engine = sql_backend(backend, path)
+        return getattr(engine, name)(*args, filters=current_filters(), **kwargs)
+
+
+# KONTROLA SHODY BACKENDŮ
+# ------------------------------------------------------------------------------
+
+# Dotazy, které kontrola porovnává (název, argumenty, klíč pro seřazení řádků)
+PARITY_CASES = [
+    ("monthly_revenue", (), ["Date"]),
+    ("aov_by_country", (), ["Country"]),
+    ("top_products", ("Quantity", 10), ["ProductNo", "ProductName"]),
+    ("top_products", ("Revenue", 10), ["ProductNo", "ProductName"]),
+    ("return_rates", ("ProductName",), ["ProductName"]),
+    ("return_rates", ("Country", "sign"), ["Country"]),
+    ("return_rates", ("Month",), ["Month"]),
+    ("return_rates", ("CustomerNo", "flag", True), ["CustomerNo"]),
+    ("order_values", (), ["TransactionNo"]),
+    ("segment_summary", (), ["Segment"]),
+]
+
+
+def _normalized(table, keys):
+    table = table.copy()
+    for col in table.columns:
+        if col in keys or not pd.api.types.is_numeric_dtype(table[col]):
+            table[col] = table[col].astype(str).astype(object)
+        else:
+            table[col] = table[col].astype("float64")
+    return table.sort_values(keys).reset_index(drop=True)
+
+
+# Rozdíly mezi dvěma tabulkami (prázdný seznam = shoda)
+def compare_tables(expected, actual, keys, rtol=1e-9, atol=1e-6):
+    if list(expected.columns) != list(actual.columns):
+        return [f"columns {list(expected.columns)} != {list(actual.columns)}"]
+    if len(expected) != len(actual):
+        return [f"{len(expected)} rows != {len(actual)} rows"]
+
+    expected, actual = _normalized(expected, keys), _normalized(actual, keys)
+    problems = []
+    for col in expected.columns:
+        left, right = expected[col].to_numpy(), actual[col].to_numpy()
+        if left.dtype == object:
+            equal = left == right
+        else:
+            equal = np.isclose(left, right, rtol=rtol, atol=atol, equal_nan=True)
+        if not equal.all():
+            problems.append(f"{col}: {int((~equal).sum())} mismatching rows")
+    return problems
+
+
+# Ukázkový filtr pro kontrolu: poslední čtvrtletí, tři největší země, bez vratek
+def sample_filters(path=DATA_PATH):
+    from data.filters import Filters
+
+    cube = load_cube(path)
+    last = cube.orders["Day"].max()
+    countries = rollup(cube.products, "Country", ["Revenue"])["Revenue"].nlargest(3).index
+    return Filters(
+        start=(last - pd.DateOffset(months=3)).date(), end=last.date(),
+        countries=tuple(sorted(str(c) for c in countries)), returns=False,
+    )
+
+
+def check_parity(backend, path=DATA_PATH):
+    results = {}
+    for name, args, keys in PARITY_CASES:
+        label = f"{name}{args if args else ''}"
+        expected = query(name, *args, backend="pandas", path=path, precomputed=False)
+        actual = query(name, *args, backend=backend, path=path, precomputed=False)
+        results[label] = compare_tables(expected, actual, keys)
+    return results
+
+
+# Spuštění: python -m data.queries --backend sqlite|duckdb|polars [cesta_k_csv]
+# Porovná každý dotaz pro celý dataset a pro ukázkový filtr (poslední
+# čtvrtletí, tři největší země, bez vratek).
+if __name__ == "__main__":
+    import os
+
+    args = sys.argv[1:]
+    backend = args[args.index("--backend") + 1] if "--backend" in args else "sqlite"
+    paths = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] != "--backend")]
+    path = os.path.abspath(paths[0] if paths else DATA_PATH)
+
+    failed = False
+    for filters in (None, sample_filters(path)):
+        st.session_state["filters"] = filters
+        print("filter:", "none" if filters is None else filters)
+        for label, problems in check_parity(backend, path).items():
+            print(f"  {label:<40} {'OK' if not problems else '; '.join(problems)}")
+            failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
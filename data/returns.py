@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# METRIKY VRATEK PRO LIBOVOLNÉ SESKUPENÍ
+# ------------------------------------------------------------------------------
+#
+# Jeden vektorový průchod: prodané a vrácené kusy a vrácené tržby se nejdřív
+# spočítají pro všechny řádky najednou (ořezané sloupce), pak stačí jediné
+# groupby(...).sum() podle zvoleného klíče (země, produkt, zákazník, měsíc).
+#
+# Co je vratka, určuje basis:
+#   "flag" - řádky s ReturnFlag (SoldQuantity / ReturnedQuantity, viz data.derive);
+#            záporné opravné řádky bez příznaku se nepočítají ani jako prodej
+#   "sign" - znaménko Quantity: kladné množství je prodej, záporné vratka
+#
+# Výstup (index = klíč seskupení):
+#   Sold_Qty, Returned_Qty, Returned_Revenue, Return Rate (%)
+#   s orders=True navíc Total_Orders, Returned_Orders, Order Return Rate (%)
+#   (počty unikátních transakcí, vrácené = transakce s ReturnFlag)
+
+
+def _rate(part, total):
+    return part / total.replace(0, np.nan) * 100
+
+
+def return_metrics(df, by, basis="flag", orders=False):
+    keys = [by] if isinstance(by, str) else list(by)
+    quantity = df["Quantity"].to_numpy()
+    revenue = df["Revenue"].to_numpy()
+
+    if basis == "flag":
+        returned = df["ReturnFlag"].to_numpy(dtype=bool)
+        sold_qty = df["SoldQuantity"].to_numpy()
+        returned_qty = df["ReturnedQuantity"].to_numpy()
+        returned_revenue = np.where(returned, np.abs(revenue), 0.0)
+    elif basis == "sign":
+        sold_qty = np.clip(quantity, 0, None)
+        returned_qty = np.clip(-quantity, 0, None)
+        returned_revenue = np.where(quantity < 0, -revenue, 0.0)
+    else:
+        raise ValueError(f"unknown basis: {basis!r}")
+
+    lines = pd.DataFrame({
+        **{key: df[key] for key in keys},
+        "Sold_Qty": sold_qty,
+        "Returned_Qty": returned_qty,
+        "Returned_Revenue": returned_revenue,
+    })
+    metrics = lines.groupby(keys, observed=True).sum()
+    metrics["Return Rate (%)"] = _rate(metrics["Returned_Qty"], metrics["Sold_Qty"])
+
+    if orders:
+        # Jedna transakce = jeden řádek (příznak vratky je vlastnost transakce)
+        unique_orders = df[[*keys, "TransactionNo", "ReturnFlag"]].drop_duplicates()
+        grouped = unique_orders.groupby(keys, observed=True)["ReturnFlag"]
+        metrics["Total_Orders"] = grouped.size()
+        metrics["Returned_Orders"] = grouped.sum()
+        metrics["Order Return Rate (%)"] = _rate(metrics["Returned_Orders"], metrics["Total_Orders"])
+
+    return metrics
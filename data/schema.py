@@ -0,0 +1,183 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Deklarované schéma datasetu v paměti
+# ------------------------------------------------------------------------------
+
+# Dimenze s malým počtem hodnot - kategorie (kódy místo řetězců,
+# groupby nad kódy je navíc výrazně rychlejší)
+CATEGORY_COLUMNS = ["Country", "ProductName", "ProductNo"]
+
+# Identifikátory - int32, pokud jsou čistě číselné, jinak kategorie
+ID_COLUMNS = ["TransactionNo", "CustomerNo"]
+
+# Množství - int32
+INT_COLUMNS = ["Quantity"]
+
+# Cena - float32, pokud se tím neztratí přesnost na haléře (pence)
+MONEY_COLUMNS = ["Price"]
+
+
+def _fits_int32(values):
+    info = np.iinfo(np.int32)
+    return len(values) == 0 or (values.min() >= info.min and values.max() <= info.max)
+
+
+# Identifikátor: int32 (Int32 při chybějících hodnotách) nebo kategorie
+def _compact_id(series):
+    numeric = pd.to_numeric(series, errors="coerce")
+    present = numeric.dropna()
+    if (
+        numeric.notna().sum() == series.notna().sum()
+        and (present == present.round()).all()
+        and _fits_int32(present)
+    ):
+        return numeric.astype("int32" if len(present) == len(series) else "Int32")
+    return series.astype("category")
+
+
+def _compact_int(series):
+    if _fits_int32(series):
+        return series.astype("int32")
+    return series
+
+
+# float32 jen tehdy, když hodnoty zaokrouhlené na 2 desetinná místa zůstanou stejné
+def _compact_money(series):
+    narrow = series.astype("float32")
+    if np.array_equal(narrow.astype("float64").round(2), series.round(2), equal_nan=True):
+        return narrow
+    return series
+
+
+# ReturnFlag jako skutečný bool (CSV může obsahovat i řetězce "True"/"False")
+def _to_bool(series):
+    if series.dtype == bool:
+        return series
+    return series.astype(str).str.strip().str.lower().isin(["true", "1", "yes"])
+
+
+# Převod DataFrame na kompaktní schéma.
+# money_as_pence=True uloží cenu jako celé pence (int32) - přesné součty bez
+# zaokrouhlovacích chyb (Revenue pak počítá data.derive z cen v librách).
+def apply_schema(df, money_as_pence=False):
+    df = df.copy(deep=False)
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    for col in ID_COLUMNS:
+        if col in df.columns:
+            df[col] = _compact_id(df[col])
+
+    for col in INT_COLUMNS:
+        if col in df.columns:
+            df[col] = _compact_int(df[col])
+
+    for col in MONEY_COLUMNS:
+        if col not in df.columns:
+            continue
+        if money_as_pence:
+            df[col] = (df[col] * 100).round().astype("int32")
+        else:
+            df[col] = _compact_money(df[col])
+
+    if "ReturnFlag" in df.columns:
+        df["ReturnFlag"] = _to_bool(df["ReturnFlag"])
+
+    return df
+
+
+# Převod nově načtených řádků na typy už načtené tabulky (přírůstkové načítání).
+# Pokud se typ nedá sladit (např. v číselném ID se objeví písmeno), vyhodí
+# TypeError a volající musí načíst celý dataset znovu.
+def align_schema(df, reference):
+    df = df.copy(deep=False)
+    for col in df.columns.intersection(reference.columns):
+        target = reference[col].dtype
+        if df[col].dtype == target:
+            continue
+        if isinstance(target, pd.CategoricalDtype):
+            values = df[col] if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].astype(str)
+            df[col] = values.astype("category")
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            raise TypeError(f"Column {col} no longer fits {target}")
+        else:
+            df[col] = df[col].astype(target)
+    return df
+
+
+# Spojení tabulek se zachováním kategorií (pd.concat by kategorie
+# s různými hodnotami převedl zpět na řetězce)
+def concat_compact(frames):
+    frames = [f for f in frames if len(f)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+
+    first = frames[0]
+    for col in first.columns:
+        if not all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            continue
+        categories = first[col].cat.categories
+        for frame in frames[1:]:
+            categories = categories.append(frame[col].cat.categories.difference(categories))
+        frames = [
+            f if f[col].cat.categories.equals(categories)
+            else f.assign(**{col: f[col].cat.set_categories(categories)})
+            for f in frames
+        ]
+    return pd.concat(frames, ignore_index=True)
+
+
+# Cena v librách bez ohledu na to, zda je uložena v pencích
+def price_in_pounds(series):
+    if pd.api.types.is_integer_dtype(series):
+        return series / 100
+    return series
+
+
+# MEMORY REPORT - velikost sloupců před a po převodu na schéma
+# ------------------------------------------------------------------------------
+
+def memory_report(before, after):
+    before_bytes = before.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+
+    report = pd.DataFrame({
+        "Column": before_bytes.index,
+        "Dtype Before": [str(before[col].dtype) for col in before_bytes.index],
+        "Dtype After": [str(after[col].dtype) if col in after else "" for col in before_bytes.index],
+        "Bytes Before": before_bytes.values,
+        "Bytes After": after_bytes.reindex(before_bytes.index).fillna(0).astype("int64").values,
+    })
+
+    total = pd.DataFrame({
+        "Column": ["TOTAL"],
+        "Dtype Before": [""],
+        "Dtype After": [""],
+        "Bytes Before": [report["Bytes Before"].sum()],
+        "Bytes After": [report["Bytes After"].sum()],
+    })
+    report = pd.concat([report, total], ignore_index=True)
+
+    report["Saving (%)"] = (
+        (1 - report["Bytes After"] / report["Bytes Before"].replace(0, np.nan)) * 100
+    ).round(1)
+
+    return report
+
+
+# Spuštění: python -m data.schema [cesta_k_csv] [--pence]
+if __name__ == "__main__":
+    from data.loader import read_csv
+    from data.settings import DATA_PATH
+
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    raw = read_csv(args[0] if args else DATA_PATH)
+    compact = apply_schema(raw, money_as_pence="--pence" in sys.argv)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(memory_report(raw, compact).to_string(index=False))
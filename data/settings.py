@@ -0,0 +1,48 @@
+import os
+
+# Cesta k vyčištěnému datasetu (lze přepsat proměnnou prostředí)
+DATA_PATH = os.environ.get("SALES_DATA_PATH", "cleaned_sales_data.csv")
+
+# Adresář pro odvozené soubory (binární kopie datasetu apod.)
+CACHE_DIR = os.environ.get("SALES_CACHE_DIR", ".cache")
+
+# Adresář předpočítaných výsledků (python -m data.precompute)
+ARTIFACT_DIR = os.environ.get("SALES_ARTIFACT_DIR", os.path.join(CACHE_DIR, "artifacts"))
+
+# Ukládat ceny jako celé pence (int32) místo float32
+MONEY_AS_PENCE = os.environ.get("SALES_MONEY_AS_PENCE", "0") == "1"
+
+# Načítání po částech pro datasety větší než paměť:
+# "1" = zapnuto, "0" = vypnuto, "auto" = zapnout, pokud je CSV větší než limit paměti
+STREAMING = os.environ.get("SALES_STREAMING", "auto")
+
+# Limit paměti (MB) pro jednu zpracovávanou část při načítání po částech
+MAX_MEMORY_MB = int(os.environ.get("SALES_MAX_MEMORY_MB", "2048"))
+
+# Výchozí způsob počítání unikátních hodnot: "exact" nebo "approx" (HyperLogLog)
+DISTINCT_COUNTS = os.environ.get("SALES_DISTINCT_COUNTS", "exact")
+
+# Profilování sekcí stránek - výchozí stav přepínače v postranním panelu
+PROFILING = os.environ.get("SALES_PROFILING", "0") == "1"
+
+# Měřit i změnu alokované paměti v sekcích (tracemalloc, výrazně zpomaluje)
+PROFILE_MEMORY = os.environ.get("SALES_PROFILE_MEMORY", "0") == "1"
+
+# Exporty na pozadí - počet souběžně zapisovaných souborů a doba (hodiny),
+# po které se hotové soubory ze spool adresáře mažou
+EXPORT_WORKERS = int(os.environ.get("SALES_EXPORT_WORKERS", "2"))
+EXPORT_TTL_HOURS = float(os.environ.get("SALES_EXPORT_TTL_HOURS", "24"))
+
+# Cache hotových grafů stránek (data.figures) - max. počet grafů a velikost (MB)
+FIGURE_CACHE_SIZE = int(os.environ.get("SALES_FIGURE_CACHE_SIZE", "128"))
+FIGURE_CACHE_MB = int(os.environ.get("SALES_FIGURE_CACHE_MB", "64"))
+
+# Backend pro agregace stránek (data.queries): "pandas" (výchozí),
+# "duckdb" nebo "sqlite" - SQL nad vestavěným enginem (data.sql),
+# "polars" - líné dotazy Polars (data.lazy)
+QUERY_BACKEND = os.environ.get("SALES_QUERY_BACKEND", "pandas")
+
+# Lokální JSON API (python -m data.api) - adresa, port a počet odpovědí v cache
+API_HOST = os.environ.get("SALES_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("SALES_API_PORT", "8502"))
+API_CACHE_SIZE = int(os.environ.get("SALES_API_CACHE_SIZE", "64"))
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.settings import DISTINCT_COUNTS
+
+# PŘIBLIŽNÉ POČTY UNIKÁTNÍCH HODNOT (HyperLogLog)
+# ------------------------------------------------------------------------------
+#
+# Sketch má 2^precision jednobajtových registrů bez ohledu na počet hodnot.
+# Dva sketche se slučují po registrech (maximum), takže se dají stavět po
+# částech dat a ukládat spolu s předagregacemi.
+# Směrodatná relativní chyba odhadu je 1.04 / sqrt(2^precision).
+
+# 16 384 registrů (16 KB), chyba ±0.81 %
+DEFAULT_PRECISION = 14
+
+# Konstanta alfa pro malé počty registrů (pro ostatní se počítá)
+_ALPHA = {16: 0.673, 32: 0.697, 64: 0.709}
+
+
+# Kanonický hash pro pole unikátních hodnot - číselné ID se hashuje stejně
+# jako jeho textová podoba ("581482" i 581482 i 581482.0)
+def _hash_uniques(uniques):
+    uniques = np.asarray(uniques, dtype=object)
+    numeric = pd.to_numeric(pd.Series(uniques), errors="coerce").to_numpy(dtype="float64")
+    integral = np.isfinite(numeric) & (numeric == np.round(numeric))
+    hashes = np.empty(len(uniques), dtype="uint64")
+    hashes[integral] = pd.util.hash_array(numeric[integral].astype("int64"))
+    hashes[~integral] = pd.util.hash_array(uniques[~integral].astype(str).astype(object))
+    return hashes
+
+
+# 64bitový hash každé hodnoty sloupce (bez chybějících hodnot)
+def hash_values(values):
+    values = pd.Series(values).dropna()
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return pd.util.hash_array(values.to_numpy(dtype="int64"))
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Hashují se jen kategorie, řádky je převezmou přes kódy
+        return _hash_uniques(values.cat.categories.to_numpy())[values.cat.codes.to_numpy()]
+    codes, uniques = pd.factorize(values)
+    return _hash_uniques(uniques)[codes]
+
+
+# Index registru (horních `precision` bitů) a pozice první jedničky ve zbytku
+def _index_rank(hashes, precision):
+    index = (hashes >> np.uint64(64 - precision)).astype(np.intp)
+    # Zbytek hashe zkrácený na 53 bitů, aby ho šlo převést na float beze ztráty
+    rest = (hashes << np.uint64(precision)) >> np.uint64(11)
+    _, bit_length = np.frexp(rest.astype("float64"))
+    rank = np.where(rest == 0, 54, 54 - bit_length)
+    return index, rank.astype(np.uint8)
+
+
+# Odhad počtu z registrů
+def _estimate(registers):
+    m = len(registers)
+    alpha = _ALPHA.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype("float64")))
+    zeros = np.sum(registers == 0)
+    # Pro malé počty je přesnější lineární odhad podle prázdných registrů
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+def relative_error(precision=DEFAULT_PRECISION):
+    return float(1.04 / np.sqrt(1 << precision))
+
+
+class HyperLogLog:
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8) if registers is None else registers
+
+    @classmethod
+    def from_values(cls, values, precision=DEFAULT_PRECISION):
+        return cls(precision).update(values)
+
+    def update(self, values):
+        index, rank = _index_rank(hash_values(values), self.precision)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError(f"cannot merge sketches with precision {self.precision} and {other.precision}")
+        return HyperLogLog(self.precision, np.maximum(self.registers, other.registers))
+
+    def count(self):
+        return int(round(float(_estimate(self.registers))))
+
+    @property
+    def relative_error(self):
+        return relative_error(self.precision)
+
+
+# Zvolený způsob počítání (přepínač v postranním panelu, výchozí ze settings)
+def approximate_counts():
+    return st.session_state.get("distinct_counts", DISTINCT_COUNTS) == "approx"
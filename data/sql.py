@@ -0,0 +1,250 @@
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+import pyarrow.feather as feather
+import streamlit as st
+
+from data.customers import SEGMENTS
+from data.loader import _sidecar_is_fresh, data_version, sidecar_path
+from data.settings import DATA_PATH
+
+# SQL BACKEND PRO AGREGACE STRÁNEK
+# ------------------------------------------------------------------------------
+#
+# Agregace z data.queries jako SQL nad vestavěným (in-process) enginem:
+#
+#   duckdb - čte přímo binární kopii (Arrow IPC, memory-map), nebo CSV, když
+#            kopie není aktuální. Načítá jen sloupce, které dotaz použije,
+#            a počítá na všech jádrech. Volitelná závislost (pip install duckdb).
+#   sqlite - ze standardní knihovny, pro prostředí bez DuckDB. Potřebné sloupce
+#            CSV se jednou (po částech) zkopírují do tabulky v paměti;
+#            dotazy běží v jednom vlákně.
+#
+# Oba enginy vidí stejný pohled `sales`: Day ('YYYY-MM-DD') a Month ('YYYY-MM')
+# jako text, ProductNo / TransactionNo / Country jako text, ReturnFlag
+# a Revenue = Quantity × cena v librách (zaokrouhlená na pence jako v data.derive).
+# Globální filtr (data.filters) se převádí na podmínku WHERE.
+
+ENGINES = ("duckdb", "sqlite")
+
+# Sloupce, podle kterých se smí seskupovat (do SQL se vkládají jako text)
+GROUP_COLUMNS = {"Country", "ProductName", "ProductNo", "CustomerNo", "Month"}
+MEASURES = {"Quantity", "Revenue"}
+
+# Sloupce CSV, které dotazy potřebují
+SOURCE_COLUMNS = [
+    "TransactionNo", "Date", "ProductNo", "ProductName", "Price", "Quantity", "CustomerNo", "Country", "ReturnFlag",
+]
+
+# Počet řádků CSV na jednu část při plnění tabulky SQLite
+SQLITE_CHUNK_ROWS = 500_000
+
+
+def _quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _connect_duckdb(path):
+    import duckdb  # Volitelná závislost - jen pro tento backend
+
+    con = duckdb.connect()
+    con.execute(f"SET threads TO {os.cpu_count() or 1}")
+
+    sidecar = sidecar_path(path)
+    if _sidecar_is_fresh(path, sidecar):
+        table = feather.read_table(sidecar, memory_map=True)
+        con.register("raw", table)
+        price_type = table.schema.field("Price").type
+        price = "Price / 100.0" if str(price_type).startswith("int") else "ROUND(CAST(Price AS DOUBLE), 2)"
+    else:
+        con.execute(f"CREATE VIEW raw AS SELECT * FROM read_csv({_quote(path)}, dateformat = '%d/%m/%Y')")
+        price = "ROUND(CAST(Price AS DOUBLE), 2)"
+
+    con.execute(f"""
+        CREATE VIEW sales AS SELECT
+            CAST(TransactionNo AS VARCHAR) AS TransactionNo,
+            strftime(Date, '%Y-%m-%d') AS Day,
+            strftime(Date, '%Y-%m') AS Month,
+            CAST(ProductNo AS VARCHAR) AS ProductNo,
+            CAST(ProductName AS VARCHAR) AS ProductName,
+            Quantity,
+            CAST(CustomerNo AS BIGINT) AS CustomerNo,
+            CAST(Country AS VARCHAR) AS Country,
+            CAST(ReturnFlag AS BOOLEAN) AS ReturnFlag,
+            Quantity * {price} AS Revenue
+        FROM raw
+    """)
+    return con
+
+
+def _connect_sqlite(path):
+    con = sqlite3.connect(":memory:", check_same_thread=False)
+    # Jen potřebné sloupce a po částech - celý dataset se do paměti nenačítá
+    for chunk in pd.read_csv(path, usecols=SOURCE_COLUMNS, chunksize=SQLITE_CHUNK_ROWS):
+        date = pd.to_datetime(chunk["Date"], format="%d/%m/%Y")
+        pd.DataFrame({
+            "TransactionNo": chunk["TransactionNo"].astype(str),
+            "Day": date.dt.strftime("%Y-%m-%d"),
+            "Month": date.dt.strftime("%Y-%m"),
+            "ProductNo": chunk["ProductNo"].astype(str),
+            "ProductName": chunk["ProductName"],
+            "Quantity": chunk["Quantity"],
+            "CustomerNo": chunk["CustomerNo"].astype("Int64"),
+            "Country": chunk["Country"],
+            "ReturnFlag": chunk["ReturnFlag"].astype(int),
+            "Revenue": chunk["Quantity"] * chunk["Price"].round(2),
+        }).to_sql("sales", con, index=False, if_exists="append")
+    return con
+
+
+# Podmínka WHERE pro globální filtr a další podmínky dotazu
+def _where(filters, *conditions):
+    clauses, params = list(conditions), []
+    if filters is not None:
+        if filters.start is not None:
+            clauses.append("Day >= ?")
+            params.append(filters.start.isoformat())
+        if filters.end is not None:
+            clauses.append("Day <= ?")
+            params.append(filters.end.isoformat())
+        if filters.countries:
+            clauses.append(f"Country IN ({', '.join('?' * len(filters.countries))})")
+            params.extend(filters.countries)
+        if not filters.returns:
+            clauses.append("NOT ReturnFlag")
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class SQLBackend:
+    def __init__(self, engine, path=DATA_PATH):
+        if engine not in ENGINES:
+            raise ValueError(f"unknown SQL engine: {engine!r}")
+        self.engine = engine
+        self.con = _connect_duckdb(path) if engine == "duckdb" else _connect_sqlite(path)
+        self._lock = threading.Lock()  # Jedno spojení sdílené relacemi
+
+    def fetch(self, sql, params=()):
+        with self._lock:
+            if self.engine == "duckdb":
+                return self.con.execute(sql, list(params)).df()
+            return pd.read_sql_query(sql, self.con, params=list(params))
+
+    def monthly_revenue(self, filters=None):
+        where, params = _where(filters)
+        monthly = self.fetch(f"""
+            SELECT Month AS Date,
+                   SUM(CASE WHEN NOT ReturnFlag THEN Revenue ELSE 0 END) AS Total_Revenue,
+                   COUNT(DISTINCT CASE WHEN NOT ReturnFlag THEN TransactionNo END) AS Orders_Count,
+                   SUM(CASE WHEN ReturnFlag THEN 1 ELSE 0 END) AS Return_Count,
+                   SUM(CASE WHEN ReturnFlag THEN Revenue ELSE 0 END) AS Returned_Revenue
+            FROM sales {where}
+            GROUP BY Month
+            HAVING SUM(CASE WHEN NOT ReturnFlag THEN 1 ELSE 0 END) > 0
+            ORDER BY Month
+        """, params)
+        monthly.insert(3, "Average_Order_Value", (monthly["Total_Revenue"] / monthly["Orders_Count"]).round(2))
+        monthly["Net_Revenue"] = monthly["Total_Revenue"] - monthly["Returned_Revenue"]
+        return monthly
+
+    def aov_by_country(self, filters=None):
+        where, params = _where(filters, "NOT ReturnFlag")
+        aov = self.fetch(f"""
+            SELECT Country, SUM(Revenue) AS Revenue, COUNT(DISTINCT TransactionNo) AS Orders
+            FROM sales {where}
+            GROUP BY Country
+        """, params)
+        aov["AOV"] = aov["Revenue"] / aov["Orders"]
+        return aov.sort_values(by="AOV", ascending=False).reset_index(drop=True)
+
+    def top_products(self, measure, n, filters=None):
+        if measure not in MEASURES:
+            raise ValueError(f"unknown measure: {measure!r}")
+        where, params = _where(filters)
+        return self.fetch(f"""
+            WITH top AS (
+                SELECT ProductNo, SUM({measure}) AS Value
+                FROM sales {where}
+                GROUP BY ProductNo
+                ORDER BY Value DESC
+                LIMIT ?
+            ), names AS (
+                SELECT DISTINCT ProductNo, ProductName FROM sales {where}
+            )
+            SELECT top.ProductNo, names.ProductName, top.Value
+            FROM top LEFT JOIN names ON names.ProductNo = top.ProductNo
+            ORDER BY top.Value DESC
+        """, [*params, n, *params])
+
+    def return_rates(self, by, basis="flag", orders=False, filters=None):
+        if by not in GROUP_COLUMNS:
+            raise ValueError(f"unknown grouping column: {by!r}")
+        if basis == "flag":
+            sold = "CASE WHEN NOT ReturnFlag AND Quantity > 0 THEN Quantity ELSE 0 END"
+            returned = "CASE WHEN ReturnFlag THEN ABS(Quantity) ELSE 0 END"
+            returned_revenue = "CASE WHEN ReturnFlag THEN ABS(Revenue) ELSE 0 END"
+        elif basis == "sign":
+            sold = "CASE WHEN Quantity > 0 THEN Quantity ELSE 0 END"
+            returned = "CASE WHEN Quantity < 0 THEN -Quantity ELSE 0 END"
+            returned_revenue = "CASE WHEN Quantity < 0 THEN -Revenue ELSE 0 END"
+        else:
+            raise ValueError(f"unknown basis: {basis!r}")
+
+        # Objednávky jako unikátní dvojice (transakce, příznak vratky) - viz data.returns
+        order_counts = """,
+                   COUNT(DISTINCT CASE WHEN NOT ReturnFlag THEN TransactionNo END) AS Kept_Orders,
+                   COUNT(DISTINCT CASE WHEN ReturnFlag THEN TransactionNo END) AS Returned_Orders""" if orders else ""
+
+        where, params = _where(filters, f"{by} IS NOT NULL")
+        rates = self.fetch(f"""
+            SELECT {by}, SUM({sold}) AS Sold_Qty, SUM({returned}) AS Returned_Qty,
+                   SUM({returned_revenue}) AS Returned_Revenue{order_counts}
+            FROM sales {where}
+            GROUP BY {by}
+            ORDER BY {by}
+        """, params)
+        rates["Return Rate (%)"] = rates["Returned_Qty"] / rates["Sold_Qty"].replace(0, float("nan")) * 100
+        if orders:
+            rates["Total_Orders"] = rates.pop("Kept_Orders") + rates["Returned_Orders"]
+            rates["Returned_Orders"] = rates.pop("Returned_Orders")
+            rates["Order Return Rate (%)"] = rates["Returned_Orders"] / rates["Total_Orders"] * 100
+        return rates
+
+    def order_values(self, filters=None):
+        where, params = _where(filters)
+        return self.fetch(f"""
+            SELECT TransactionNo, SUM(Revenue) AS TotalOrderValue
+            FROM sales {where}
+            GROUP BY TransactionNo
+        """, params)
+
+    # Segmenty zákazníků podle počtu objednávek (hranice jako SEGMENT_BINS v data.customers)
+    def segment_summary(self, filters=None):
+        where, params = _where(filters, "CustomerNo IS NOT NULL")
+        summary = self.fetch(f"""
+            WITH transactions AS (
+                SELECT CustomerNo, TransactionNo, SUM(Revenue) AS Revenue
+                FROM sales {where}
+                GROUP BY CustomerNo, TransactionNo
+            ), customers AS (
+                SELECT CustomerNo, COUNT(*) AS Orders, SUM(Revenue) AS Revenue
+                FROM transactions
+                GROUP BY CustomerNo
+            )
+            SELECT CASE WHEN Orders <= 1 THEN 'New' WHEN Orders <= 5 THEN 'Returning' ELSE 'Loyal' END AS Segment,
+                   COUNT(*) AS Customers, SUM(Orders) AS Orders, SUM(Revenue) AS Total_Revenue
+            FROM customers
+            GROUP BY 1
+        """, params)
+        return summary.set_index("Segment").reindex(SEGMENTS, fill_value=0).reset_index()
+
+
+# Spojení - jedno na engine a verzi dat (nová verze = nové načtení zdroje)
+@st.cache_resource(max_entries=2)
+def _backend(engine, path, version):
+    return SQLBackend(engine, path)
+
+
+def sql_backend(engine, path=DATA_PATH):
+    return _backend(engine, path, data_version(path))
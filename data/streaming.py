@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data.derive import add_derived_columns
+from data.schema import align_schema, apply_schema, concat_compact
+from data.settings import MAX_MEMORY_MB, MONEY_AS_PENCE, STREAMING
+
+# NAČÍTÁNÍ PO ČÁSTECH (out-of-core)
+# ------------------------------------------------------------------------------
+#
+# CSV se čte po částech omezené velikosti. Každá část se otypuje, dopočítají
+# se odvozené sloupce a z ní se postaví dílčí agregace, které se pak slučují
+# (merge) do výsledku. V paměti je tak vždy jen jedna část a průběžné agregace.
+#
+# Řádky jedné transakce zůstávají vždy v jedné části (konec části se přenese
+# do další), takže počty unikátních transakcí v buňkách agregací jsou sčitatelné.
+
+# Kolik řádků se načte pro odhad velikosti řádku v paměti
+SAMPLE_ROWS = 10_000
+
+# Nejmenší velikost části v řádcích
+MIN_CHUNK_ROWS = 10_000
+
+# Parsování, odvozené sloupce a dílčí agregace potřebují zhruba tolikanásobek
+# velikosti samotné části
+WORKING_SET_FACTOR = 4
+
+
+def streaming_enabled(path):
+    if STREAMING in ("0", "1"):
+        return STREAMING == "1"
+    return os.path.getsize(path) > MAX_MEMORY_MB * 1024 * 1024
+
+
+def _prepare(raw):
+    raw["Date"] = pd.to_datetime(raw["Date"], format="%d/%m/%Y")  # Oprava typu
+    return add_derived_columns(apply_schema(raw, money_as_pence=MONEY_AS_PENCE))
+
+
+# Počet řádků v jedné části tak, aby se vešla do limitu paměti
+def chunk_rows(source, max_memory_mb=MAX_MEMORY_MB):
+    sample = _prepare(pd.read_csv(source, nrows=SAMPLE_ROWS))
+    if hasattr(source, "seek"):
+        source.seek(0)
+    row_bytes = max(1, sample.memory_usage(deep=True).sum() / max(1, len(sample)))
+    return max(MIN_CHUNK_ROWS, int(max_memory_mb * 1024 * 1024 / (row_bytes * WORKING_SET_FACTOR)))
+
+
+# Rozdělení části na celé transakce a řádky poslední (možná neúplné) transakce
+def _split_last_transaction(chunk):
+    tx = chunk["TransactionNo"].to_numpy()
+    other = np.flatnonzero(tx != tx[-1])
+    cut = other[-1] + 1 if len(other) else 0
+    return chunk.iloc[:cut], chunk.iloc[cut:]
+
+
+def iter_chunks(source, rows):
+    reference = None
+    carry = None
+    for raw in pd.read_csv(source, chunksize=rows):
+        chunk = _prepare(raw)
+        if reference is None:
+            reference = chunk.iloc[:0]
+        else:
+            try:
+                chunk = align_schema(chunk, reference)
+            except TypeError:
+                pass  # Např. ID s písmenem v jinak číselném sloupci - necháme vlastní typ
+        if carry is not None and len(carry):
+            chunk = concat_compact([carry, chunk])
+        complete, carry = _split_last_transaction(chunk)
+        if len(complete):
+            yield complete
+    if carry is not None and len(carry):
+        yield carry
+
+
+# Jeden průchod souborem - dílčí agregace se staví z každé části a slučují.
+# aggregates: název -> Aggregate (build, update, merge) z data.loader
+def scan(source, aggregates, max_memory_mb=MAX_MEMORY_MB):
+    values = {}
+    for chunk in iter_chunks(source, chunk_rows(source, max_memory_mb)):
+        for name, agg in aggregates.items():
+            part = agg.build(chunk)
+            values[name] = part if name not in values else agg.merge(values[name], part)
+
+    if len(values) < len(aggregates):  # Prázdný soubor
+        if hasattr(source, "seek"):
+            source.seek(0)
+        empty = _prepare(pd.read_csv(source, nrows=0))
+        for name, agg in aggregates.items():
+            values.setdefault(name, agg.build(empty))
+    return values
@@ -0,0 +1,147 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# SYNTETICKÁ DATA VE SCHÉMATU cleaned_sales_data.csv
+# ------------------------------------------------------------------------------
+#
+# Generátor pro měření výkonu na libovolném počtu řádků. Rozložení odpovídá
+# reálnému exportu: desítky řádků na transakci, popularita produktů i zákazníků
+# podle mocninného zákona, převaha United Kingdom, ~2 % stornovaných transakcí
+# (TransactionNo s prefixem "C", záporné množství, ReturnFlag) a chybějící
+# CustomerNo u malé části transakcí. Data se generují a zapisují po částech,
+# takže jde vytvořit i soubor větší než paměť.
+
+COLUMNS = ["TransactionNo", "Date", "ProductNo", "ProductName", "Price",
+           "Quantity", "CustomerNo", "Country", "ReturnFlag"]
+
+# Země a jejich podíl na zákaznících
+COUNTRIES = {
+    "United Kingdom": 0.880, "Germany": 0.020, "France": 0.018, "EIRE": 0.012,
+    "Spain": 0.007, "Netherlands": 0.006, "Belgium": 0.005, "Switzerland": 0.005,
+    "Portugal": 0.004, "Australia": 0.004, "Norway": 0.003, "Italy": 0.003,
+    "Channel Islands": 0.003, "Finland": 0.003, "Cyprus": 0.002, "Sweden": 0.002,
+    "Austria": 0.002, "Denmark": 0.002, "Japan": 0.002, "Poland": 0.002,
+    "USA": 0.002, "Israel": 0.001, "Unspecified": 0.001, "Singapore": 0.001,
+    "Iceland": 0.001, "Canada": 0.001, "Greece": 0.001, "Malta": 0.001,
+    "United Arab Emirates": 0.001, "RSA": 0.001, "Lebanon": 0.001, "Lithuania": 0.001,
+    "Brazil": 0.001, "Czech Republic": 0.001, "Bahrain": 0.001, "Saudi Arabia": 0.001,
+}
+
+ADJECTIVES = ["Red", "Blue", "White", "Pink", "Green", "Vintage", "Retro", "Small",
+              "Large", "Jumbo", "Glass", "Wooden", "Paper", "Heart", "Star", "Spotty"]
+NOUNS = ["Lantern", "Bag", "Mug", "Candle Holder", "Cake Case", "Doormat", "Tin",
+         "Clock", "Bunting", "Notebook", "Lunch Box", "Garland", "Cushion Cover",
+         "Tea Set", "Jam Jar", "Wall Art"]
+
+PRODUCTS = 3800
+FIRST_TRANSACTION = 536365
+START_DATE = pd.Timestamp("2018-12-01")
+DAYS = 374
+
+# Průměrný počet řádků na transakci a na zákazníka
+LINES_PER_TRANSACTION = 23
+LINES_PER_CUSTOMER = 110
+
+RETURN_RATE = 0.02       # Podíl stornovaných transakcí
+MISSING_CUSTOMER = 0.005  # Podíl transakcí bez CustomerNo
+
+CHUNK_ROWS = 1_000_000
+
+
+# Mocninné váhy pro n položek (první položky nejčastější)
+def _power_weights(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _catalogue(rng):
+    numbers = rng.choice(np.arange(10002, 90000), PRODUCTS, replace=False).astype(str)
+    suffix = rng.random(PRODUCTS) < 0.15  # Varianty produktu, např. 85123A
+    numbers = np.where(suffix, np.char.add(numbers, "A"), numbers)
+
+    names = np.char.add(
+        np.char.add(rng.choice(ADJECTIVES, PRODUCTS), " "),
+        rng.choice(NOUNS, PRODUCTS),
+    )
+    names = np.char.add(np.char.add(names, " "), numbers)  # Jednoznačné názvy
+
+    prices = np.round(rng.lognormal(mean=1.6, sigma=0.8, size=PRODUCTS) + 5, 2)
+    return numbers, names, prices
+
+
+def generate(rows, seed=0, chunk_rows=CHUNK_ROWS):
+    rng = np.random.default_rng(seed)
+    product_no, product_name, product_price = _catalogue(rng)
+    product_weights = _power_weights(PRODUCTS, 1.0)
+
+    customers = max(10, rows // LINES_PER_CUSTOMER)
+    customer_no = rng.choice(np.arange(12346, 12346 + customers * 2), customers, replace=False)
+    country_weights = np.array(list(COUNTRIES.values()))
+    customer_country = rng.choice(list(COUNTRIES), customers, p=country_weights / country_weights.sum())
+    customer_weights = _power_weights(customers, 0.8)
+
+    transactions = max(1, rows // LINES_PER_TRANSACTION)
+    dates = (START_DATE + pd.to_timedelta(np.arange(DAYS), unit="D")).strftime("%d/%m/%Y").to_numpy()
+    next_transaction = 0
+    written = 0
+    while written < rows:
+        size = min(chunk_rows, rows - written)
+
+        # Transakce v této části (vzestupně, datum roste s číslem transakce)
+        lines = rng.geometric(1 / LINES_PER_TRANSACTION, size)
+        count = int(np.searchsorted(np.cumsum(lines), size)) + 1
+        lines = lines[:count]
+        lines[-1] -= lines.sum() - size
+        tx = next_transaction + np.arange(count)
+        next_transaction += count
+
+        day = np.minimum(tx * DAYS // transactions, DAYS - 1)
+        returned = rng.random(count) < RETURN_RATE
+        customer = rng.choice(customers, count, p=customer_weights)
+        missing = rng.random(count) < MISSING_CUSTOMER
+
+        product = rng.choice(PRODUCTS, size, p=product_weights)
+        quantity = np.minimum(rng.geometric(0.15, size), 80_000)
+        bulk = rng.random(size) < 0.002  # Velkoobchodní objednávky
+        quantity[bulk] *= 100
+
+        line_tx = np.repeat(np.arange(count), lines)
+        line_returned = returned[line_tx]
+        numbers = (FIRST_TRANSACTION + tx).astype(str)
+
+        yield pd.DataFrame({
+            "TransactionNo": np.where(returned, np.char.add("C", numbers), numbers)[line_tx],
+            "Date": dates[day][line_tx],
+            "ProductNo": product_no[product],
+            "ProductName": product_name[product],
+            "Price": product_price[product],
+            "Quantity": np.where(line_returned, -quantity, quantity),
+            "CustomerNo": np.where(missing, np.nan, customer_no[customer].astype("float64"))[line_tx],
+            "Country": customer_country[customer][line_tx],
+            "ReturnFlag": line_returned,
+        }, columns=COLUMNS)
+        written += size
+
+
+def write_csv(path, rows, seed=0, chunk_rows=CHUNK_ROWS):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    for i, chunk in enumerate(generate(rows, seed, chunk_rows)):
+        chunk.to_csv(tmp_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+# Spuštění: python -m data.synthetic <počet_řádků> [výstupní_csv] [--seed N]
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    seed = int(args[args.index("--seed") + 1]) if "--seed" in args else 0
+    paths = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] != "--seed")]
+    if not paths:
+        sys.exit("usage: python -m data.synthetic <rows> [output.csv] [--seed N]")
+
+    rows = int(float(paths[0]))
+    print(write_csv(paths[1] if len(paths) > 1 else f"synthetic_{rows}.csv", rows, seed))
@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.filters import current_filters
+from data.loader import dataset_store, register_aggregate
+from data.settings import DATA_PATH
+
+# DENNÍ ŘADA S INDEXEM MĚSÍCŮ
+# ------------------------------------------------------------------------------
+#
+# days   - tržby a počet unikátních objednávek za den (bez vratek),
+#          seřazené podle dne
+# months - měsíc (Period "M") -> slice řádků v `days`
+#
+# Výběr měsíce je tak jen řez předpočítané tabulky, bez filtrování
+# a bez přepočtu objednávek přes celý dataset.
+
+DailySeries = namedtuple("DailySeries", ["days", "months"])
+
+
+def _month_offsets(days):
+    months = days.index.to_period("M")
+    if not len(months):
+        return {}
+    # Hranice měsíců v seřazeném indexu
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    stops = np.r_[starts[1:], len(months)]
+    return {months[start]: slice(start, stop) for start, stop in zip(starts, stops)}
+
+
+def _series(days):
+    days = days.sort_index()
+    return DailySeries(days, _month_offsets(days))
+
+
+def build_daily(df):
+    sales = df[~df["ReturnFlag"].to_numpy(dtype=bool)]
+    days = sales.groupby(sales["Date"].dt.normalize().rename("Day")).agg(
+        Revenue=("Revenue", "sum"),
+        Orders=("TransactionNo", "nunique"),
+    )
+    return _series(days)
+
+
+# Přírůstek: dny z přírůstku se přepočítají z doplněné tabulky
+# (objednávka mohla začít před přírůstkem), ostatní dny zůstávají
+def update_daily(daily, delta, merged):
+    days = delta["Date"].dt.normalize().unique()
+    recompute = merged[merged["Date"].dt.normalize().isin(days)]
+    kept = daily.days[~daily.days.index.isin(days)]
+    return _series(pd.concat([kept, build_daily(recompute).days]))
+
+
+# Sloučení z disjunktních částí dat (celé transakce, viz data.streaming)
+def merge_daily(left, right):
+    return _series(pd.concat([left.days, right.days]).groupby(level="Day").sum())
+
+
+register_aggregate("daily", build_daily, update_daily, merge_daily)
+
+
+def month_days(daily, month):
+    return daily.days.iloc[daily.months.get(pd.Period(month, freq="M"), slice(0, 0))]
+
+
+def load_daily(path=DATA_PATH):
+    with st.spinner("Building aggregates..."):
+        return dataset_store(path).aggregate("daily", current_filters())
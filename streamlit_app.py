@@ -1,39 +1,45 @@
 # Import potřebných knihoven
 # ------------------------------------------------------------------------------
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import datetime
-import time
-from io import BytesIO
-import plotly.graph_objects as go
+
+from data.filters import render_filters
+from data.jobs import render_jobs
+from data.loader import dataset_store
+from data.pages import PAGES
+from data.profiling import render_panel, section, start_run
+from data.settings import DISTINCT_COUNTS, PROFILE_MEMORY, PROFILING
 
 # Nastavení postranního panelu
 st.sidebar.title("Navigace")
-page = st.sidebar.selectbox("Vyberte stránku", ["General Overview", 
-                                                "Best-Selling Products", 
-                                                "Sales Trends Over Time", 
-                                                "Returned Products & Refunds",
-                                                "Customer Insights",
-                                                "Geographic Analysis",
-                                                "Anomalies & Issues Detection"]
-                            )
-
-# Dynamické načítání obsahu stránek
-if page == "General Overview":
-    exec(open("data/pages/General_Overview.py").read())
-elif page == "Best-Selling Products":
-    exec(open("data/pages/Best_Selling_Products.py").read())
-elif page == "Sales Trends Over Time":
-    exec(open("data/pages/Sales_Trends.py").read())
-elif page == "Returned Products & Refunds":
-    exec(open("data/pages/Returned_Products.py").read())
-elif page == "Customer Insights":
-    exec(open("data/pages/Customer_Insights.py").read())
-elif page == "Geographic Analysis":
-    exec(open("data/pages/Geographic_Analysis.py").read())
-elif page == "Anomalies & Issues Detection":
-    exec(open("data/pages/Anomalies.py").read())
+page = st.sidebar.selectbox("Vyberte stránku", list(PAGES))
+
+# Globální filtr (období, země, vratky) - platí pro všechny stránky.
+# Hranice období a seznam zemí z nefiltrované kostky.
+store = dataset_store()
+filters = render_filters(store.aggregate("cube"))
+
+# Přesné / přibližné (HyperLogLog) počty unikátních hodnot
+st.sidebar.radio(
+    "Počty unikátních hodnot",
+    options=["exact", "approx"],
+    format_func=lambda x: "Přesné" if x == "exact" else "Přibližné (HyperLogLog)",
+    index=1 if DISTINCT_COUNTS == "approx" else 0,
+    key="distinct_counts",
+)
+
+# Profilování sekcí stránky (časy, řádky, volitelně paměť)
+if st.sidebar.checkbox("Profilovat sekce stránky", value=PROFILING, key="profiling"):
+    st.sidebar.checkbox("Měřit paměť (tracemalloc)", value=PROFILE_MEMORY, key="profiling_memory")
+
+# Prázdný výběr - stránky by neměly co zobrazit
+if filters is not None and store.aggregate("cube", filters).orders.empty:
+    st.warning("No data matches the selected filter. Adjust the period, countries or returns in the sidebar.")
+    st.stop()
 
+# Vykreslení vybrané stránky
+start_run(page)
+with section(page):
+    PAGES[page].render()
+render_panel()
+render_jobs()
 
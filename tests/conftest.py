@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Testy se spouští z kořene repozitáře (python -m pytest) i přímo (pytest)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Binární kopie, indexy a předpočty testovacích dat mimo .cache/ repozitáře
+# (data.settings čte proměnnou při importu, tedy před importem testů)
+os.environ.setdefault("SALES_CACHE_DIR", tempfile.mkdtemp(prefix="sales-tests-"))
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.derive import DERIVED_COLUMNS, add_derived_columns, check_derived_columns
+from data.schema import apply_schema
+
+
+# Surové řádky ve formátu CSV: prodej, vratka, vratka s kladným množstvím,
+# záporný opravný řádek bez příznaku vratky a nulové množství
+def raw_frame():
+    return pd.DataFrame({
+        "TransactionNo": [536365, 536366, 536367, 536368, 536369, 536370],
+        "Date": pd.to_datetime(["01/12/2018", "01/12/2018", "15/01/2019", "15/01/2019", "31/01/2019", "01/02/2019"],
+                               format="%d/%m/%Y"),
+        "ProductNo": ["P1", "P1", "P2", "P3", "P2", "P1"],
+        "ProductName": ["Product 1", "Product 1", "Product 2", "Product 3", "Product 2", "Product 1"],
+        "Price": [2.55, 2.55, 10.99, 0.85, 10.99, 3.10],
+        "Quantity": [6, -2, 3, -5, 0, 12],
+        "CustomerNo": [17850.0, 17850.0, 13047.0, np.nan, 13047.0, 12583.0],
+        "Country": ["United Kingdom", "United Kingdom", "France", "France", "EIRE", "Germany"],
+        "ReturnFlag": [False, True, True, False, False, False],
+    })
+
+
+@pytest.mark.parametrize("money_as_pence", [False, True])
+def test_matches_anomalies_reference(money_as_pence):
+    # Původní řádkové výpočty stránky Anomalies (data.derive.reference_columns)
+    mismatches = check_derived_columns(raw_frame(), money_as_pence=money_as_pence)
+    assert mismatches == {col: 0 for col in DERIVED_COLUMNS}
+
+
+def test_returned_products_reference():
+    raw = raw_frame()
+    derived = add_derived_columns(apply_schema(raw))
+
+    # Původní řádkové výpočty stránky Returned Products: vrácené kusy se
+    # znaménkem, prodané kusy včetně záporných opravných řádků
+    returned = raw.apply(lambda row: row["Quantity"] if row["ReturnFlag"] else 0, axis=1)
+    sold = raw.apply(lambda row: row["Quantity"] if not row["ReturnFlag"] else 0, axis=1)
+
+    # Odvozené sloupce mají definici stránky Anomalies (data.returns je
+    # používá na obou stránkách): vrácené kusy v absolutní hodnotě
+    # a prodané kusy bez záporných opravných řádků
+    assert derived["ReturnedQuantity"].tolist() == returned.abs().tolist()
+    assert derived["SoldQuantity"].tolist() == sold.clip(lower=0).tolist()
+
+    # Rozdíl proti původním měsíčním součtům jsou právě opravné řádky
+    corrections = raw["Quantity"].where(~raw["ReturnFlag"] & (raw["Quantity"] < 0), 0)
+    assert (sold - derived["SoldQuantity"]).tolist() == corrections.tolist()
+
+
+def test_derived_types():
+    derived = add_derived_columns(apply_schema(raw_frame()))
+    assert derived["Revenue"].tolist() == pytest.approx([15.3, -5.1, 32.97, -4.25, 0.0, 37.2])
+    assert derived["AbsQuantity"].tolist() == [6, 2, 3, 5, 0, 12]
+    assert derived["YearMonth"].astype(str).tolist() == ["2018-12", "2018-12", "2019-01", "2019-01", "2019-01", "2019-02"]
@@ -0,0 +1,21 @@
+import os
+
+from data.loader import read_dataset
+from data.synthetic import write_csv
+
+
+# Soubor nahrazený jiným se starším časem úpravy (cp -p, rsync -t) se musí
+# načíst znovu, ne z binární kopie původních dat
+def test_sidecar_not_reused_for_replaced_csv(tmp_path):
+    path = str(tmp_path / "sales.csv")
+    write_csv(path, 8_000, seed=1)
+    assert len(read_dataset(path)) == 8_000
+
+    stat = os.stat(path)
+    replacement = str(tmp_path / "replacement.csv")
+    write_csv(replacement, 5_000, seed=2)
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+    os.replace(replacement, path)
+
+    assert len(read_dataset(path)) == 5_000
+    assert len(read_dataset(path)) == 5_000  # Nová kopie už odpovídá novému souboru